@@ -30,7 +30,11 @@ def main():
         booster = MadridMetadataBooster(
             catalog_url=os.getenv('CATALOG_URL', 'https://datos.madrid.es/api/v2/catalog/datasets'),
             openai_api_key=api_key,
-            output_dir='reports'
+            output_dir='reports',
+            cache_dir=os.getenv('CACHE_DIR', 'cache'),
+            offline=os.getenv('OFFLINE', '').lower() in ('1', 'true'),
+            incremental=os.getenv('INCREMENTAL', '').lower() in ('1', 'true'),
+            report_shard_size=int(os.getenv('REPORT_SHARD_SIZE', '0')) or None
         )
         
         # Analizar el catálogo
@@ -0,0 +1,46 @@
+import os
+import sys
+from src.metadata_analyzer.analyzer import MetadataAnalyzer
+from src.metadata_analyzer.sources import CSVCatalogSource
+from src.dataset_recommender.recommender import DatasetRecommender
+from src.dataset_recommender.index import ExactIndex, IVFIndex, LSHIndex
+from src.dataset_recommender.benchmark import benchmark_index
+
+# Configuraciones a comparar con la búsqueda exacta
+CONFIGURACIONES = {
+    'IVF n_probe=2': lambda: IVFIndex(n_probe=2),
+    'IVF n_probe=8': lambda: IVFIndex(n_probe=8),
+    'IVF n_probe=16': lambda: IVFIndex(n_probe=16),
+    'LSH 12 bits x 8 tablas': lambda: LSHIndex(n_bits=12, n_tables=8),
+    'LSH 8 bits x 16 tablas': lambda: LSHIndex(n_bits=8, n_tables=16),
+    'LSH 8 bits x 16 tablas (sin rerank)': lambda: LSHIndex(n_bits=8, n_tables=16, rerank=False)
+}
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'catalogo.csv'
+    if not os.path.exists(csv_path):
+        print(f'No se encontró el archivo {csv_path}. Descárgalo primero.')
+        return
+
+    # Cargar el catálogo y ajustar el TF-IDF del recomendador
+    analyzer = MetadataAnalyzer(catalog_url='', source=CSVCatalogSource(csv_path))
+    datasets = analyzer.load_catalog()
+    recommender = DatasetRecommender()
+    recommender.fit(datasets)
+    matrix = recommender.tfidf_matrix
+
+    # Consultas: los títulos de una muestra de datasets
+    step = max(1, len(datasets) // 500)
+    queries = recommender.vectorizer.transform(datasets.titles[::step])
+    exact = ExactIndex().build(matrix)
+    k = 10
+
+    print(f'{len(datasets)} datasets, {queries.shape[0]} consultas, k={k}\n')
+    print(f"{'Índice':<40}{'recall@k':>10}{'QPS':>12}{'QPS exacto':>12}{'build (s)':>12}")
+    for nombre, crear in CONFIGURACIONES.items():
+        resultado = benchmark_index(crear(), matrix, queries, k=k, exact=exact)
+        print(f"{nombre:<40}{resultado['recall_at_k']:>10.3f}{resultado['qps']:>12.0f}"
+              f"{resultado['exact_qps']:>12.0f}{resultado['build_seconds']:>12.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
-import pandas as pd
 import os
+from src.metadata_analyzer.catalog_cache import CatalogCache
+from src.metadata_analyzer.rules import CSV_CATALOG_RULES
 
 def main():
     csv_path = 'catalogo.csv'
@@ -7,34 +8,22 @@ def main():
         print(f'No se encontró el archivo {csv_path}. Descárgalo primero.')
         return
 
-    # Leer el CSV (el delimitador es ';')
-    df = pd.read_csv(csv_path, delimiter=';', encoding='latin1')
+    # Leer solo las columnas necesarias (desde la caché columnar del CSV)
+    df = CatalogCache(csv_path).load(columns=[
+        'Nombre', 'URL', 'Sector', 'Palabras clave:', 'Licencia:',
+        'Frecuencia de actualización:', 'Formatos'
+    ])
 
     # Filtrar solo los datasets que tienen 'API' en la columna 'Formatos'
     api_datasets = df[df['Formatos'].str.contains('API', case=False, na=False)]
 
-    # Criterios de calidad
-    problematic = []
-    for _, row in api_datasets.iterrows():
-        problems = []
-        if not isinstance(row['Nombre'], str) or len(row['Nombre'].strip()) < 5:
-            problems.append('Nombre muy corto o vacío')
-        if not isinstance(row['Sector'], str) or not row['Sector'].strip():
-            problems.append('Sin sector')
-        if not isinstance(row['Palabras clave:'], str) or len(row['Palabras clave:'].split(',')) < 3:
-            problems.append('Pocas palabras clave')
-        if not isinstance(row['Licencia:'], str) or not row['Licencia:'].strip():
-            problems.append('Sin licencia')
-        if not isinstance(row['Frecuencia de actualización:'], str) or not row['Frecuencia de actualización:'].strip():
-            problems.append('Sin frecuencia')
-        if not isinstance(row['Formatos'], str) or len(row['Formatos'].split(',')) < 2:
-            problems.append('Pocos formatos')
-        if problems:
-            problematic.append({
-                'Nombre': row['Nombre'],
-                'URL': row['URL'] if 'URL' in row else '',
-                'Problemas': problems
-            })
+    # Criterios de calidad (evaluados por columnas sobre todo el catálogo)
+    api_datasets = api_datasets.assign(URL=api_datasets['URL'] if 'URL' in api_datasets else '')
+    problematic = CSV_CATALOG_RULES.problematic_rows(
+        api_datasets, {'Nombre': 'Nombre', 'URL': 'URL'}
+    )
+    for ds in problematic:
+        ds['Problemas'] = ds.pop('problems')
 
     if not problematic:
         print('No se encontraron APIs problemáticas.')
@@ -1,17 +1,27 @@
 import os
 from typing import Dict, List, Optional
 from datetime import datetime
-from .metadata_analyzer.analyzer import MetadataAnalyzer
-from .quality_scorer.scorer import QualityScorer
-from .llm_enhancer.enhancer import LLMEnhancer
+from .metadata_analyzer.analyzer import MetadataAnalyzer, DatasetStore
+from .metadata_analyzer.sources import CatalogSource
+from .metadata_analyzer.http_cache import HTTPCache
+from .quality_scorer.scorer import QualityScorer, QualityScore, QualityScores
+from .llm_enhancer.enhancer import LLMEnhancer, EnhancedMetadata
+from .llm_enhancer.cache import ResponseCache
 from .report_generator.generator import ReportGenerator
 from .dataset_recommender.recommender import DatasetRecommender
+from .state_store.store import StateStore
+from .pipeline.dag import Pipeline
 
 class MadridMetadataBooster:
     def __init__(self, 
                  catalog_url: str,
                  openai_api_key: Optional[str] = None,
-                 output_dir: str = 'reports'):
+                 output_dir: str = 'reports',
+                 catalog_source: Optional[CatalogSource] = None,
+                 cache_dir: Optional[str] = None,
+                 offline: bool = False,
+                 incremental: bool = False,
+                 report_shard_size: Optional[int] = None):
         """
         Initialize the Madrid Metadata Booster
         
@@ -19,55 +29,215 @@ class MadridMetadataBooster:
             catalog_url: URL of the Madrid open data catalog
             openai_api_key: OpenAI API key (optional, can be set via environment variable)
             output_dir: Directory for generated reports
+            catalog_source: Source to read the catalog from (optional, defaults to the known endpoints)
+            cache_dir: Directory for on-disk caches (optional, disables caching if not set)
+            offline: Serve catalog requests and LLM responses only from the cache
+            incremental: Only re-process datasets whose metadata changed since the last run
+            report_shard_size: Split the report into an index and detail pages of this many rows (optional)
         """
         self.catalog_url = catalog_url
         self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self.incremental = incremental
+        self.report_shard_size = report_shard_size
         
         # Initialize components
-        self.metadata_analyzer = MetadataAnalyzer(catalog_url)
+        http_cache = None
+        response_cache = None
+        if cache_dir:
+            http_cache = HTTPCache(os.path.join(cache_dir, 'http'), offline=offline)
+            response_cache = ResponseCache(os.path.join(cache_dir, 'llm'), replay=offline)
+        self.metadata_analyzer = MetadataAnalyzer(
+            catalog_url, source=catalog_source, http_cache=http_cache
+        )
         self.quality_scorer = QualityScorer()
-        self.llm_enhancer = LLMEnhancer(api_key=openai_api_key)
-        self.report_generator = ReportGenerator()
-        self.dataset_recommender = DatasetRecommender()
+        self.llm_enhancer = LLMEnhancer(api_key=openai_api_key, response_cache=response_cache)
+        self.report_generator = ReportGenerator(
+            bytecode_cache_dir=os.path.join(cache_dir, 'templates') if cache_dir else None,
+            auto_reload=False
+        )
+        self.dataset_recommender = DatasetRecommender(top_k=10)
         
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
+
+        self.state_store = None
+        if incremental:
+            self.state_store = StateStore(os.path.join(output_dir, 'state.sqlite'))
         
     def analyze_catalog(self) -> Dict:
-        """Analyze the entire catalog and generate reports"""
-        # Analyze metadata
-        analysis_df = self.metadata_analyzer.analyze_metadata()
-        
-        # Calculate quality scores
-        quality_scores = self.quality_scorer.calculate_scores(analysis_df)
+        """Analyze the entire catalog and generate reports
+
+        The stages run as a DAG: scoring, recommender fitting and LLM
+        enhancement start as soon as the catalog is parsed, and the report is
+        rendered once its inputs are ready. Per-stage wall times (in seconds)
+        are returned under ``stage_timings``.
+        """
+        pipeline = Pipeline()
+        pipeline.add('load', self.metadata_analyzer.load_catalog)
+        done, load_timings = {}, {}
+        incremental = self.incremental
+        if incremental:
+            # El modo incremental guarda los resultados por id: con ids repetidos se analiza todo
+            done, load_timings = pipeline.run()
+            if len(set(done['load'].ids)) != len(done['load']):
+                print("Duplicate dataset ids in the catalog, analyzing every dataset")
+                incremental = False
+        if incremental:
+            self._add_incremental_stages(pipeline)
+        else:
+            self._add_full_stages(pipeline)
+        pipeline.add('report', self._generate_report, depends_on=['results'])
+        pipeline.add('pdf', self._wait_for_pdf, depends_on=['report'])
+
+        results, timings = pipeline.run(done)
+        timings = {**load_timings, **timings, 'total': timings['total'] + load_timings.get('total', 0.0)}
+        return {**results['pdf'], 'stage_timings': timings}
+
+    def _add_full_stages(self, pipeline: Pipeline):
+        """Analyze, score and enhance every dataset in the catalog"""
+        pipeline.add('analyze', lambda load: self.metadata_analyzer.analyze_datasets(load),
+                     depends_on=['load'])
+        pipeline.add('score', lambda analyze: self.quality_scorer.calculate_scores(analyze),
+                     depends_on=['analyze'])
+        pipeline.add('problems', lambda load: self.metadata_analyzer.get_problematic_datasets(load),
+                     depends_on=['load'])
+        pipeline.add('enhance', lambda problems: self.llm_enhancer.batch_enhance(problems),
+                     depends_on=['problems'])
+        pipeline.add('results', lambda score, problems, enhance: (score, problems, enhance),
+                     depends_on=['score', 'problems', 'enhance'])
+        pipeline.add('fit', lambda load: self.dataset_recommender.fit(load), depends_on=['load'])
+
+    def _add_incremental_stages(self, pipeline: Pipeline):
+        """Process only new or changed datasets and merge with stored results"""
+        pipeline.add('changes', self._find_changes, depends_on=['load'])
+        pipeline.add('score', self._score_changed, depends_on=['changes'])
+        pipeline.add('problems', lambda changes: {
+            p['id']: p for p in self.metadata_analyzer.get_problematic_datasets(changes['changed'])
+        }, depends_on=['changes'])
+        pipeline.add('enhance', lambda problems: {
+            r.dataset_id: r for r in self.llm_enhancer.batch_enhance_results(list(problems.values()))
+        }, depends_on=['problems'])
+        pipeline.add('fit', self._update_recommender, depends_on=['load', 'changes'])
+        # El recomendador se guarda antes de confirmar los cambios en el almacén de estado
+        pipeline.add('results', lambda fit, **stages: self._merge_incremental(**stages),
+                     depends_on=['load', 'changes', 'score', 'problems', 'enhance', 'fit'])
+
+    def _find_changes(self, load: DatasetStore) -> Dict:
+        """Hash every dataset and diff it against the state store"""
+        hashes = {dataset_id: StateStore.content_hash(load.record(i))
+                  for i, dataset_id in enumerate(load.ids)}
+        changed_ids, removed_ids = self.state_store.diff(hashes)
+        changed_set = set(changed_ids)
+        changed = load.take([i for i, dataset_id in enumerate(load.ids) if dataset_id in changed_set])
+        return {'hashes': hashes, 'changed': changed, 'changed_set': changed_set, 'removed': removed_ids}
+
+    def _score_changed(self, changes: Dict) -> Dict[str, QualityScore]:
+        # Analizar y puntuar solo los datasets nuevos o modificados
+        if not len(changes['changed']):
+            return {}
+        analysis_df = self.metadata_analyzer.analyze_datasets(changes['changed'])
+        return {s.dataset_id: s for s in self.quality_scorer.calculate_scores(analysis_df)}
+
+    def _update_recommender(self, load: DatasetStore, changes: Dict):
+        """Apply the changed and removed datasets to the recommender saved by the last run"""
+        path = os.path.join(self.output_dir, 'recommender.npz')
+        recommender = None
+        if os.path.exists(path):
+            try:
+                recommender = DatasetRecommender.load(path)
+            except Exception as e:
+                print(f"Error loading recommender state: {str(e)}")
+        if recommender is not None:
+            recommender.partial_fit(changes['changed'], removed_ids=changes['removed'])
+            # Si el estado guardado no corresponde al catálogo actual, se reajusta entero
+            if sorted(recommender.ids) != sorted(load.ids):
+                recommender = None
+        if recommender is None:
+            recommender = self.dataset_recommender
+            recommender.fit(load)
+        recommender.save(path)
+        self.dataset_recommender = recommender
+
+    def _merge_incremental(self, load: DatasetStore, changes: Dict, score: Dict,
+                           problems: Dict, enhance: Dict):
+        """Save the new results and merge them with the stored ones"""
+        changed_set = changes['changed_set']
+        for dataset_id in changes['changed'].ids:
+            new_score = score.get(dataset_id)
+            result = enhance.get(dataset_id)
+            if result is not None and not result.success:
+                # Sin guardar el nuevo hash, el dataset se reintenta en la próxima ejecución
+                print(f"Error enhancing dataset {dataset_id}: {result.error}")
+                continue
+            enhanced = result.metadata if result else None
+            self.state_store.save(
+                dataset_id,
+                changes['hashes'][dataset_id],
+                quality_score=vars(new_score) if new_score else None,
+                problems=problems.get(dataset_id),
+                enhanced_metadata=vars(enhanced) if enhanced else None
+            )
+        self.state_store.delete(changes['removed'])
+        self.state_store.commit()
+
+        # Fusionar con los resultados almacenados de los datasets sin cambios
+        stored = self.state_store.load(i for i in load.ids if i not in changed_set)
+        quality_scores, problematic_datasets, enhanced_metadata = [], [], []
+        for dataset_id in load.ids:
+            if dataset_id in changed_set:
+                dataset_score = score.get(dataset_id)
+                dataset_problems = problems.get(dataset_id)
+                result = enhance.get(dataset_id)
+                enhanced = result.metadata if result else None
+            else:
+                entry = stored.get(dataset_id, {})
+                dataset_score = (QualityScore(**entry['quality_score'])
+                                 if entry.get('quality_score') else None)
+                dataset_problems = entry.get('problems')
+                enhanced = (EnhancedMetadata(**entry['enhanced_metadata'])
+                            if entry.get('enhanced_metadata') else None)
+            if dataset_score is not None:
+                quality_scores.append(dataset_score)
+            if dataset_problems is not None:
+                problematic_datasets.append(dataset_problems)
+            if enhanced is not None:
+                enhanced_metadata.append(enhanced)
+
+        quality_scores = QualityScores.from_scores(quality_scores, self.quality_scorer.issue_labels)
+        # Las incidencias que dependen de la fecha actual se recalculan también para los guardados
+        self.quality_scorer.refresh_time_based_issues(
+            quality_scores, self.metadata_analyzer.analyze_update_dates(load)
+        )
+        return quality_scores, problematic_datasets, enhanced_metadata
+
+    def _generate_report(self, results) -> Dict:
+        """Summarize the results and render the report (the PDF keeps running in the background)"""
+        quality_scores, problematic_datasets, enhanced_metadata = results
         quality_summary = self.quality_scorer.get_quality_summary(quality_scores)
-        
-        # Get problematic datasets
-        problematic_datasets = self.metadata_analyzer.get_problematic_datasets()
-        
-        # Enhance metadata for problematic datasets
-        enhanced_metadata = self.llm_enhancer.batch_enhance(problematic_datasets)
         enhancement_summary = self.llm_enhancer.get_enhancement_summary(enhanced_metadata)
-        
-        # Generate report
+
         report_paths = self.report_generator.generate_monthly_report(
-            quality_scores=[vars(score) for score in quality_scores],
+            quality_scores=quality_scores.to_records(),
             enhanced_metadata=[vars(metadata) for metadata in enhanced_metadata],
             problematic_datasets=problematic_datasets,
             quality_summary=quality_summary,
             enhancement_summary=enhancement_summary,
             output_dir=self.output_dir,
-            format='both'
+            format='both',
+            shard_size=self.report_shard_size,
+            wait=False
         )
-        
-        # Train recommender
-        self.dataset_recommender.fit(self.metadata_analyzer.datasets)
-        
         return {
             'quality_summary': quality_summary,
             'enhancement_summary': enhancement_summary,
             'report_paths': report_paths
         }
+
+    def _wait_for_pdf(self, report: Dict) -> Dict:
+        if report['report_paths'].get('pdf') not in self.report_generator.wait_for_pdf_reports():
+            report['report_paths'].pop('pdf', None)
+        return report
     
     def get_dataset_recommendations(self, 
                                   dataset_id: Optional[str] = None,
@@ -94,12 +264,9 @@ class MadridMetadataBooster:
     
     def enhance_single_dataset(self, dataset_id: str) -> Dict:
         """Enhance metadata for a single dataset"""
-        dataset = next(
-            (d for d in self.metadata_analyzer.datasets if d.id == dataset_id),
-            None
-        )
+        dataset = self.metadata_analyzer.datasets.find(dataset_id)
         if not dataset:
             raise ValueError(f"Dataset with ID {dataset_id} not found")
             
-        enhanced = self.llm_enhancer.enhance_metadata(vars(dataset))
+        enhanced = self.llm_enhancer.enhance_metadata(dataset.to_dict())
         return vars(enhanced)
@@ -0,0 +1,51 @@
+import time
+from typing import Dict, Optional
+import numpy as np
+from scipy import sparse
+from .index import ExactIndex, VectorIndex
+
+def benchmark_index(index: VectorIndex,
+                    matrix: sparse.csr_matrix,
+                    queries: sparse.csr_matrix,
+                    k: int = 10,
+                    exact: Optional[ExactIndex] = None) -> Dict:
+    """Measure recall@k and queries per second of an index against exact search
+
+    Queries are sent one at a time, as ``get_recommendations_by_text`` does.
+
+    Args:
+        index: Index to evaluate (it is built on ``matrix``)
+        matrix: TF-IDF matrix of the catalog
+        queries: TF-IDF vectors of the queries
+        k: Number of results per query
+        exact: Already built exact baseline (optional)
+    """
+    if exact is None:
+        exact = ExactIndex().build(matrix)
+    truth, exact_seconds = _search_one_by_one(exact, queries, k)
+
+    start = time.perf_counter()
+    index.build(matrix)
+    build_seconds = time.perf_counter() - start
+
+    found, search_seconds = _search_one_by_one(index, queries, k)
+
+    hits = [len(np.intersect1d(truth[i], found[i][found[i] >= 0])) for i in range(queries.shape[0])]
+    n_queries = queries.shape[0]
+    return {
+        'recall_at_k': float(np.sum(hits) / max(truth.size, 1)),
+        'qps': n_queries / search_seconds if search_seconds else float('inf'),
+        'exact_qps': n_queries / exact_seconds if exact_seconds else float('inf'),
+        'build_seconds': build_seconds
+    }
+
+def _search_one_by_one(index: VectorIndex, queries: sparse.csr_matrix, k: int):
+    queries = queries.tocsr()
+    start = time.perf_counter()
+    results = [index.search(queries[i], k)[0][0] for i in range(queries.shape[0])]
+    seconds = time.perf_counter() - start
+    width = max((len(r) for r in results), default=0)
+    found = np.full((len(results), width), -1, dtype=np.intp)
+    for i, r in enumerate(results):
+        found[i, :len(r)] = r
+    return found, seconds
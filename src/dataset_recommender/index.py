@@ -0,0 +1,202 @@
+from typing import Optional, Tuple
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the ``k`` highest scores of each row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    # argpartition es O(n); solo se ordenan los k candidatos de cada fila
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorIndex:
+    """Base class for the similarity indexes used by DatasetRecommender.
+
+    Rows and queries are L2-normalized TF-IDF vectors, so cosine similarity is
+    a dot product. ``search`` returns (indices, scores) arrays of shape
+    (queries, k), best first; rows with fewer than ``k`` candidates are padded
+    with index -1 and score -inf.
+    """
+
+    def build(self, matrix: sparse.csr_matrix) -> 'VectorIndex':
+        raise NotImplementedError
+
+    def search(self, queries: sparse.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force sparse search, ``block_size`` queries at a time"""
+
+    def __init__(self, block_size: int = 1024):
+        self.block_size = block_size
+        self.matrix = None
+        self._matrix_t = None
+
+    def build(self, matrix: sparse.csr_matrix) -> 'ExactIndex':
+        self.matrix = matrix
+        self._matrix_t = matrix.T.tocsr()
+        return self
+
+    def search(self, queries: sparse.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        n_queries = queries.shape[0]
+        k = min(k, self.matrix.shape[0])
+        indices = np.empty((n_queries, k), dtype=np.intp)
+        scores = np.empty((n_queries, k), dtype=np.float64)
+        for start in range(0, n_queries, self.block_size):
+            end = min(start + self.block_size, n_queries)
+            block = (queries[start:end] @ self._matrix_t).toarray()
+            indices[start:end] = top_k_indices(block, k)
+            scores[start:end] = np.take_along_axis(block, indices[start:end], axis=1)
+        return indices, scores
+
+
+class ReducedIndex(VectorIndex):
+    """Base for approximate indexes over a TruncatedSVD embedding.
+
+    Candidates are found in the dense reduced space; with ``rerank`` they are
+    scored with the exact TF-IDF cosine, otherwise with the embedding cosine.
+    """
+
+    def __init__(self, n_components: int = 128, rerank: bool = True, random_state: int = 0):
+        self.n_components = n_components
+        self.rerank = rerank
+        self.random_state = random_state
+        self.matrix = None
+        self.svd = None
+        self.embeddings = None
+        self._components_t = None
+
+    def build(self, matrix: sparse.csr_matrix) -> 'ReducedIndex':
+        self.matrix = matrix.tocsr()
+        n_components = max(1, min(self.n_components, matrix.shape[1] - 1, matrix.shape[0] - 1))
+        self.svd = TruncatedSVD(n_components=n_components, random_state=self.random_state)
+        self.embeddings = _normalize(self.svd.fit_transform(matrix)).astype(np.float32)
+        self._components_t = self.svd.components_.T
+        self._build_structure()
+        return self
+
+    def search(self, queries: sparse.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = queries.tocsr()
+        # Equivale a svd.transform, sin la validación de sklearn en cada llamada
+        embedded = _normalize(np.asarray(queries @ self._components_t)).astype(np.float32)
+        indices = np.full((queries.shape[0], k), -1, dtype=np.intp)
+        scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float64)
+        for i in range(queries.shape[0]):
+            candidates = self._candidates(embedded[i])
+            if not len(candidates):
+                continue
+            if self.rerank:
+                query = queries[i].toarray().ravel()
+                candidate_scores = (self.matrix[candidates] @ query)[np.newaxis, :]
+            else:
+                candidate_scores = (self.embeddings[candidates] @ embedded[i])[np.newaxis, :]
+            best = top_k_indices(candidate_scores, k)[0]
+            indices[i, :len(best)] = candidates[best]
+            scores[i, :len(best)] = candidate_scores[0, best]
+        return indices, scores
+
+    def _build_structure(self):
+        raise NotImplementedError
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        """Row indices worth scoring for an embedded query"""
+        raise NotImplementedError
+
+
+class IVFIndex(ReducedIndex):
+    """Inverted-file index: spherical k-means coarse quantizer over the embedding.
+
+    Each query scans the ``n_probe`` lists whose centroids are closest;
+    raising ``n_probe`` trades speed for recall.
+    """
+
+    def __init__(self,
+                 n_lists: Optional[int] = None,
+                 n_probe: int = 8,
+                 n_iter: int = 10,
+                 n_components: int = 128,
+                 rerank: bool = True,
+                 random_state: int = 0):
+        super().__init__(n_components=n_components, rerank=rerank, random_state=random_state)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.centroids = None
+        self._order = None
+        self._offsets = None
+
+    def _build_structure(self):
+        n_rows = self.embeddings.shape[0]
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(n_rows))), n_rows)
+        rng = np.random.default_rng(self.random_state)
+        centroids = self.embeddings[rng.choice(n_rows, n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assignment = np.argmax(self.embeddings @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.embeddings)
+            # Las listas vacías se reinician con un punto al azar
+            empty = ~sums.any(axis=1)
+            sums[empty] = self.embeddings[rng.choice(n_rows, int(empty.sum()))]
+            centroids = _normalize(sums)
+        assignment = np.argmax(self.embeddings @ centroids.T, axis=1)
+        self.centroids = centroids
+        # Listas invertidas como un único array ordenado por lista más offsets
+        self._order = np.argsort(assignment, kind='stable')
+        self._offsets = np.searchsorted(assignment[self._order], np.arange(n_lists + 1))
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        probes = top_k_indices((self.centroids @ query)[np.newaxis, :], self.n_probe)[0]
+        return np.concatenate([self._order[self._offsets[p]:self._offsets[p + 1]] for p in probes])
+
+
+class LSHIndex(ReducedIndex):
+    """Random-hyperplane LSH over the embedding.
+
+    Each of ``n_tables`` tables hashes rows into ``n_bits``-bit buckets; a
+    query scores the union of its buckets. More tables raise recall, more
+    bits shrink the buckets.
+    """
+
+    def __init__(self,
+                 n_bits: int = 12,
+                 n_tables: int = 8,
+                 n_components: int = 128,
+                 rerank: bool = True,
+                 random_state: int = 0):
+        super().__init__(n_components=n_components, rerank=rerank, random_state=random_state)
+        self.n_bits = n_bits
+        self.n_tables = n_tables
+        self.planes = None
+        self._tables = []
+
+    def _hash(self, vectors: np.ndarray) -> np.ndarray:
+        """Bucket code of each vector in every table, shape (tables, vectors)"""
+        bits = np.einsum('vd,tdb->tvb', vectors, self.planes) > 0
+        return bits.astype(np.int64) @ (1 << np.arange(self.n_bits, dtype=np.int64))
+
+    def _build_structure(self):
+        rng = np.random.default_rng(self.random_state)
+        self.planes = rng.standard_normal(
+            (self.n_tables, self.embeddings.shape[1], self.n_bits)).astype(np.float32)
+        self._tables = []
+        for codes in self._hash(self.embeddings):
+            order = np.argsort(codes, kind='stable')
+            self._tables.append((codes[order], order))
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        buckets = []
+        for (sorted_codes, order), code in zip(self._tables, self._hash(query[np.newaxis, :])[:, 0]):
+            start, end = np.searchsorted(sorted_codes, [code, code + 1])
+            buckets.append(order[start:end])
+        return np.unique(np.concatenate(buckets))
@@ -1,8 +1,13 @@
-from typing import Dict, List, Optional
+import os
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Union
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from ..metadata_analyzer.store import DatasetStore
+from .index import ExactIndex, VectorIndex, top_k_indices
 
 @dataclass
 class DatasetRecommendation:
@@ -12,8 +17,47 @@ class DatasetRecommendation:
     common_tags: List[str]
     common_categories: List[str]
 
+def _similar_rows(matrix, matrix_t, rows: np.ndarray, k: int, block_size: int):
+    """Top ``k`` neighbors of ``rows`` by dot product, excluding each row itself"""
+    k = min(k, matrix.shape[0])
+    indices = np.empty((len(rows), k), dtype=np.intp)
+    scores = np.empty((len(rows), k), dtype=np.float64)
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start:start + block_size]
+        block = (matrix[block_rows] @ matrix_t).toarray()
+        # Excluir cada dataset de sus propios vecinos
+        block[np.arange(len(block_rows)), block_rows] = -np.inf
+        best = top_k_indices(block, k)
+        indices[start:start + len(block_rows)] = best
+        scores[start:start + len(block_rows)] = np.take_along_axis(block, best, axis=1)
+    return indices, scores
+
+# Matriz TF-IDF compartida por los procesos de trabajo
+_worker_matrix = None
+
+def _init_worker(matrix):
+    global _worker_matrix
+    _worker_matrix = (matrix, matrix.T.tocsr())
+
+def _worker_similar_rows(rows: np.ndarray, k: int, block_size: int):
+    matrix, matrix_t = _worker_matrix
+    return _similar_rows(matrix, matrix_t, rows, k, block_size)
+
 class DatasetRecommender:
-    def __init__(self):
+    def __init__(self,
+                 top_k: int = 0,
+                 block_size: int = 1024,
+                 text_index: Optional[VectorIndex] = None,
+                 refit_fraction: float = 0.2):
+        """
+        Initialize the recommender
+
+        Args:
+            top_k: Number of neighbors to precompute per dataset in ``fit`` (0 disables the table)
+            block_size: Rows per block when computing the neighbor table
+            text_index: Index used for text queries (defaults to exact search; see ``index``)
+            refit_fraction: Fraction of rows changed by ``partial_fit`` after which the TF-IDF is refitted
+        """
         self.vectorizer = TfidfVectorizer(
             stop_words='english',
             max_features=5000,
@@ -21,11 +65,36 @@ class DatasetRecommender:
         )
         self.datasets = []
         self.tfidf_matrix = None
-        
-    def fit(self, datasets: List[Dict]):
-        """Fit the recommender with the dataset catalog"""
-        self.datasets = datasets
-        
+        self.top_k = top_k
+        self.block_size = block_size
+        self.text_index = text_index or ExactIndex(block_size)
+        self.refit_fraction = refit_fraction
+        self.ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._categories: Dict[str, np.ndarray] = {}
+        self._category_scores: Dict[str, np.ndarray] = {}
+        self.neighbor_indices: Optional[np.ndarray] = None
+        self.neighbor_scores: Optional[np.ndarray] = None
+        # Textos y categorías por fila, para actualizar o reajustar sin el catálogo
+        self._texts: List[str] = []
+        self._row_categories: List[str] = []
+        self._changed_since_fit = 0
+
+    @staticmethod
+    def _record(dataset_id: str, title: str, tags: List[str], category: Optional[str]) -> Dict:
+        """Fields of a row that recommendations need (the same ones ``save`` writes)"""
+        return {'id': dataset_id, 'title': title, 'tags': list(tags), 'category': category}
+
+    @classmethod
+    def _prepare(cls, datasets: Union[DatasetStore, List[Dict]]):
+        """Texts, records, ids and categories of a catalog"""
+        if isinstance(datasets, DatasetStore):
+            # Los textos salen directamente de las columnas del almacén
+            categories = list(datasets.column('category'))
+            records = [cls._record(dataset_id, datasets.titles[i], datasets.tags(i), categories[i])
+                       for i, dataset_id in enumerate(datasets.ids)]
+            return datasets.texts(), records, list(datasets.ids), categories
+
         # Prepare text for vectorization
         texts = []
         for dataset in datasets:
@@ -33,9 +102,244 @@ class DatasetRecommender:
             text += ' '.join(dataset.get('tags', []))
             text += f" {dataset.get('category', '')}"
             texts.append(text)
-            
+        ids = [dataset['id'] for dataset in datasets]
+        categories = [dataset.get('category') for dataset in datasets]
+        records = [cls._record(dataset['id'], dataset.get('title', ''), dataset.get('tags', []),
+                               dataset.get('category')) for dataset in datasets]
+        return texts, records, ids, categories
+        
+    def fit(self, datasets: Union[DatasetStore, List[Dict]]):
+        """Fit the recommender with the dataset catalog"""
+        self._fit_rows(*self._prepare(datasets))
+
+    def _fit_rows(self, texts: List[str], records, ids: List[str], categories: List[str]):
+        self.datasets = records
+        self._texts, self.ids, self._row_categories = texts, ids, categories
+        self._changed_since_fit = 0
+
         # Create TF-IDF matrix
         self.tfidf_matrix = self.vectorizer.fit_transform(texts)
+        self._build_lookups()
+
+        self.neighbor_indices = self.neighbor_scores = None
+        if self.top_k > 0:
+            self._build_neighbor_table()
+
+    def _build_lookups(self):
+        """Id index, category index and text index of the current rows"""
+        # Índice id -> fila (primera aparición de cada id)
+        self._index = {}
+        for i, dataset_id in enumerate(self.ids):
+            self._index.setdefault(dataset_id, i)
+
+        # Índice invertido categoría -> filas, con las puntuaciones calculadas bajo demanda
+        members: Dict[str, List[int]] = {}
+        for i, category in enumerate(self._row_categories):
+            members.setdefault(category, []).append(i)
+        self._categories = {category: np.array(rows) for category, rows in members.items()}
+        self._category_scores = {}
+
+        self.text_index.build(self.tfidf_matrix)
+
+    def partial_fit(self,
+                    datasets: Union[DatasetStore, List[Dict]] = (),
+                    removed_ids: Iterable[str] = ()):
+        """Add, update or remove datasets without refitting the whole catalog
+
+        Only the given datasets are vectorized, against the vocabulary and IDF
+        of the last ``fit``, and only the neighbor table rows they affect are
+        recomputed. Once more than ``refit_fraction`` of the rows have changed
+        since the last ``fit``, the TF-IDF is refitted on the current rows so
+        the vocabulary and IDF don't drift. Approximate text indexes are
+        rebuilt on every call.
+
+        Args:
+            datasets: New or changed datasets (a dataset whose id is already fitted replaces it)
+            removed_ids: Ids of the datasets to remove
+        """
+        if self.tfidf_matrix is None:
+            return self.fit(datasets)
+        texts, records, ids, categories = self._prepare(datasets)
+        removed = set(removed_ids)
+        n_old = len(self.ids)
+
+        # Fila de origen de cada fila resultante en [filas actuales; filas nuevas]
+        source = np.arange(n_old)
+        appended = []
+        for j, dataset_id in enumerate(ids):
+            row = self._index.get(dataset_id)
+            if row is None:
+                appended.append(n_old + j)
+            else:
+                source[row] = n_old + j
+        kept = np.array([dataset_id not in removed for dataset_id in self.ids], dtype=bool)
+        if not ids and kept.all():
+            return
+        source = np.concatenate([source[kept], np.array(appended, dtype=source.dtype)])
+
+        all_texts = self._texts + texts
+        all_records = self.datasets + records
+        all_ids = self.ids + ids
+        all_categories = self._row_categories + categories
+        texts, records, ids, categories = ([values[i] for i in source] for values in
+                                           (all_texts, all_records, all_ids, all_categories))
+
+        changed = np.flatnonzero(source >= n_old)
+        self._changed_since_fit += len(changed) + int(n_old - kept.sum())
+        if self._changed_since_fit > self.refit_fraction * len(source):
+            self._fit_rows(texts, records, ids, categories)
+            return
+
+        self.datasets = records
+        self._texts, self.ids, self._row_categories = texts, ids, categories
+        delta = (self.vectorizer.transform(all_texts[n_old:]) if len(all_texts) > n_old
+                 else sparse.csr_matrix((0, self.tfidf_matrix.shape[1])))
+        self.tfidf_matrix = sparse.vstack([self.tfidf_matrix, delta]).tocsr()[source]
+        self._build_lookups()
+
+        if self.neighbor_indices is not None:
+            self._update_neighbor_table(source, n_old, changed)
+
+    def _update_neighbor_table(self, source: np.ndarray, n_old: int, changed: np.ndarray):
+        """Update the neighbor table after ``partial_fit`` touched the ``changed`` rows"""
+        n_rows = self.tfidf_matrix.shape[0]
+        k = min(self.top_k, max(n_rows - 1, 0))
+        if k != self.neighbor_indices.shape[1]:
+            self._build_neighbor_table()
+            return
+
+        # Las filas sin cambios conservan sus vecinos, renumerados
+        clean = np.flatnonzero(source < n_old)
+        old_to_new = np.full(n_old, -1, dtype=np.int64)
+        old_to_new[source[clean]] = clean
+        indices = old_to_new[self.neighbor_indices[source[clean]]]
+        scores = self.neighbor_scores[source[clean]]
+
+        neighbor_indices = np.empty((n_rows, k), dtype=np.int32)
+        neighbor_scores = np.empty((n_rows, k), dtype=np.float64)
+
+        # Las que perdieron un vecino (eliminado o modificado) se recalculan enteras
+        lost = (indices < 0).any(axis=1)
+        dirty = np.concatenate([changed, clean[lost]])
+        clean, indices, scores = clean[~lost], indices[~lost], scores[~lost]
+
+        # El resto solo compara sus vecinos actuales con las filas nuevas o modificadas
+        changed_t = self.tfidf_matrix[changed].T.tocsr()
+        for start in range(0, len(clean), self.block_size):
+            rows = clean[start:start + self.block_size]
+            block = (self.tfidf_matrix[rows] @ changed_t).toarray()
+            candidate_indices = np.hstack([indices[start:start + len(rows)],
+                                           np.broadcast_to(changed, block.shape)])
+            candidate_scores = np.hstack([scores[start:start + len(rows)], block])
+            best = top_k_indices(candidate_scores, k)
+            neighbor_indices[rows] = np.take_along_axis(candidate_indices, best, axis=1)
+            neighbor_scores[rows] = np.take_along_axis(candidate_scores, best, axis=1)
+
+        if len(dirty):
+            neighbor_indices[dirty], neighbor_scores[dirty] = self._similar_rows(dirty, k)
+        self.neighbor_indices, self.neighbor_scores = neighbor_indices, neighbor_scores
+
+    # Versión del formato de ``save``
+    STATE_VERSION = 1
+
+    def save(self, path: str):
+        """Save the fitted state to an ``.npz`` file
+
+        Only arrays and JSON are written (no pickles, so ``load`` never runs
+        code from the file): the TF-IDF matrix, vocabulary and IDF, the
+        neighbor table, and the text, id, title, tags and category of every
+        row. The text index is rebuilt by ``load``.
+        """
+        matrix = self.tfidf_matrix.tocsr()
+        vocabulary = self.vectorizer.vocabulary_
+        state = {
+            'version': self.STATE_VERSION,
+            'top_k': self.top_k,
+            'changed_since_fit': self._changed_since_fit,
+            'vocabulary': sorted(vocabulary, key=vocabulary.get),
+            'ids': list(self.ids),
+            'texts': self._texts,
+            'categories': list(self._row_categories),
+            'records': self.datasets
+        }
+        arrays = {
+            'state': np.array(json.dumps(state, ensure_ascii=False)),
+            'idf': self.vectorizer.idf_,
+            'data': matrix.data,
+            'indices': matrix.indices,
+            'indptr': matrix.indptr,
+            'shape': np.array(matrix.shape)
+        }
+        if self.neighbor_indices is not None:
+            arrays['neighbor_indices'] = self.neighbor_indices
+            arrays['neighbor_scores'] = self.neighbor_scores
+        # Escritura atómica: un fichero a medias nunca sustituye al anterior
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'DatasetRecommender':
+        """Load a recommender saved with ``save``
+
+        Args:
+            path: File written by ``save``
+            **kwargs: Other constructor arguments (``top_k`` comes from the file)
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            state = json.loads(arrays['state'].item())
+            if state.get('version') != cls.STATE_VERSION:
+                raise ValueError(f"Unsupported recommender state version: {state.get('version')}")
+            recommender = cls(top_k=state['top_k'], **kwargs)
+            recommender.vectorizer.vocabulary_ = {term: i for i, term in enumerate(state['vocabulary'])}
+            recommender.vectorizer.idf_ = arrays['idf']
+            recommender.tfidf_matrix = sparse.csr_matrix(
+                (arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(arrays['shape'])
+            )
+            if 'neighbor_indices' in arrays:
+                recommender.neighbor_indices = arrays['neighbor_indices']
+                recommender.neighbor_scores = arrays['neighbor_scores']
+        recommender.datasets = state['records']
+        recommender.ids = state['ids']
+        recommender._texts = state['texts']
+        recommender._row_categories = state['categories']
+        recommender._changed_since_fit = state['changed_since_fit']
+        recommender._build_lookups()
+        return recommender
+
+    def _build_neighbor_table(self):
+        """Precompute the ``top_k`` most similar datasets of every dataset"""
+        n_rows = self.tfidf_matrix.shape[0]
+        k = min(self.top_k, max(n_rows - 1, 0))
+        indices, scores = self._similar_rows(np.arange(n_rows), k)
+        self.neighbor_indices = indices.astype(np.int32)
+        self.neighbor_scores = scores
+
+    def _similar_rows(self, rows: np.ndarray, k: int, n_jobs: int = 1):
+        """Top ``k`` neighbors of the given rows, excluding each row itself
+
+        The TF-IDF rows are L2-normalized, so cosine similarity is a sparse
+        dot product; it is computed ``block_size`` rows at a time to bound
+        memory, optionally split across ``n_jobs`` processes.
+        """
+        if n_jobs > 1 and len(rows) > self.block_size:
+            parts = np.array_split(rows, n_jobs)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(self.tfidf_matrix,)) as executor:
+                results = list(executor.map(_worker_similar_rows, parts,
+                                            [k] * n_jobs, [self.block_size] * n_jobs))
+            return (np.concatenate([r[0] for r in results]),
+                    np.concatenate([r[1] for r in results]))
+        return _similar_rows(self.tfidf_matrix, self.tfidf_matrix.T, rows, k, self.block_size)
+
+    def _neighbors(self, target_idx: int, n_recommendations: int):
+        """Indices and scores of the most similar datasets to a row"""
+        if self.neighbor_indices is not None and n_recommendations <= self.top_k:
+            return (self.neighbor_indices[target_idx, :n_recommendations],
+                    self.neighbor_scores[target_idx, :n_recommendations])
+        indices, scores = self._similar_rows(np.array([target_idx]), n_recommendations)
+        return indices[0], scores[0]
         
     def get_recommendations(self, 
                           dataset_id: str, 
@@ -43,23 +347,25 @@ class DatasetRecommender:
                           min_similarity: float = 0.1) -> List[DatasetRecommendation]:
         """Get recommendations for a specific dataset"""
         # Find the index of the target dataset
-        target_idx = next((i for i, d in enumerate(self.datasets) if d['id'] == dataset_id), None)
+        target_idx = self._index.get(dataset_id)
         if target_idx is None:
             raise ValueError(f"Dataset with ID {dataset_id} not found")
             
-        # Calculate similarity scores
-        target_vector = self.tfidf_matrix[target_idx]
-        similarity_scores = cosine_similarity(target_vector, self.tfidf_matrix).flatten()
-        
-        # Get indices of most similar datasets (excluding the target)
-        similar_indices = np.argsort(similarity_scores)[::-1][1:n_recommendations+1]
-        
+        # Most similar datasets (excluding the target), precomputed if available
+        similar_indices, similarity_scores = self._neighbors(target_idx, n_recommendations)
+        return self._dataset_recommendations(target_idx, similar_indices, similarity_scores,
+                                             min_similarity)
+
+    def _dataset_recommendations(self,
+                                 target_idx: int,
+                                 similar_indices: np.ndarray,
+                                 similarity_scores: np.ndarray,
+                                 min_similarity: float) -> List[DatasetRecommendation]:
         recommendations = []
         target_dataset = self.datasets[target_idx]
         
-        for idx in similar_indices:
-            score = similarity_scores[idx]
-            if score < min_similarity:
+        for idx, score in zip(similar_indices, similarity_scores):
+            if idx < 0 or score < min_similarity:
                 continue
                 
             dataset = self.datasets[idx]
@@ -89,16 +395,17 @@ class DatasetRecommender:
         # Transform the query text
         query_vector = self.vectorizer.transform([text])
         
-        # Calculate similarity scores
-        similarity_scores = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
-        
-        # Get indices of most similar datasets
-        similar_indices = np.argsort(similarity_scores)[::-1][:n_recommendations]
-        
+        # Most similar datasets according to the text index
+        similar_indices, similarity_scores = self.text_index.search(query_vector, n_recommendations)
+        return self._text_recommendations(similar_indices[0], similarity_scores[0], min_similarity)
+
+    def _text_recommendations(self,
+                              similar_indices: np.ndarray,
+                              similarity_scores: np.ndarray,
+                              min_similarity: float) -> List[DatasetRecommendation]:
         recommendations = []
-        for idx in similar_indices:
-            score = similarity_scores[idx]
-            if score < min_similarity:
+        for idx, score in zip(similar_indices, similarity_scores):
+            if idx < 0 or score < min_similarity:
                 continue
                 
             dataset = self.datasets[idx]
@@ -111,31 +418,87 @@ class DatasetRecommender:
             ))
             
         return recommendations
+
+    def get_recommendations_batch(self,
+                                  ids: Optional[Sequence[str]] = None,
+                                  texts: Optional[Sequence[str]] = None,
+                                  n_recommendations: int = 5,
+                                  min_similarity: float = 0.1,
+                                  return_arrays: bool = False,
+                                  n_jobs: int = 1):
+        """Get recommendations for many datasets or text queries at once
+
+        Similarities are computed with one chunked sparse product instead of
+        one pass per query. Returns one recommendation list per query, or
+        with ``return_arrays`` the (indices, scores) arrays of shape
+        (queries, n_recommendations), where results below ``min_similarity``
+        have index -1 and score -inf.
+
+        Args:
+            ids: Dataset ids to find related datasets for
+            texts: Text queries (used if ``ids`` is not given)
+            n_recommendations: Results per query
+            min_similarity: Minimum similarity score of a result
+            return_arrays: Return row indices and scores instead of recommendation lists
+            n_jobs: Processes to split dataset queries across (for all-pairs workloads)
+        """
+        if ids is not None:
+            rows = []
+            for dataset_id in ids:
+                row = self._index.get(dataset_id)
+                if row is None:
+                    raise ValueError(f"Dataset with ID {dataset_id} not found")
+                rows.append(row)
+            rows = np.array(rows, dtype=np.intp)
+            if self.neighbor_indices is not None and n_recommendations <= self.top_k:
+                indices = self.neighbor_indices[rows, :n_recommendations].astype(np.intp)
+                scores = self.neighbor_scores[rows, :n_recommendations]
+            else:
+                indices, scores = self._similar_rows(rows, n_recommendations, n_jobs=n_jobs)
+        elif texts is not None:
+            indices, scores = self.text_index.search(self.vectorizer.transform(texts), n_recommendations)
+        else:
+            raise ValueError("Must provide either ids or texts")
+
+        if return_arrays:
+            below = scores < min_similarity
+            return np.where(below, -1, indices), np.where(below, -np.inf, scores)
+        if ids is not None:
+            return [self._dataset_recommendations(row, indices[i], scores[i], min_similarity)
+                    for i, row in enumerate(rows)]
+        return [self._text_recommendations(indices[i], scores[i], min_similarity)
+                for i in range(len(indices))]
     
+    def _category_similarities(self, category: str) -> np.ndarray:
+        """Mean cosine similarity of each member of a category to all its members
+
+        The mean of row i of the category's similarity matrix is x_i · sum / n,
+        so only the category sum is needed instead of the n x n matrix.
+        """
+        similarities = self._category_scores.get(category)
+        if similarities is None:
+            members = self.tfidf_matrix[self._categories[category]]
+            centroid = np.asarray(members.sum(axis=0)).ravel() / members.shape[0]
+            similarities = self._category_scores[category] = members @ centroid
+        return similarities
+
     def get_recommendations_by_category(self,
                                       category: str,
                                       n_recommendations: int = 5) -> List[DatasetRecommendation]:
         """Get recommendations based on a category"""
-        # Filter datasets by category
-        category_datasets = [d for d in self.datasets if d.get('category') == category]
-        
-        if not category_datasets:
+        if category not in self._categories:
             return []
             
-        # Calculate average similarity within category
-        category_indices = [i for i, d in enumerate(self.datasets) if d.get('category') == category]
-        category_matrix = self.tfidf_matrix[category_indices]
-        similarity_matrix = cosine_similarity(category_matrix)
-        
-        # Calculate average similarity for each dataset
-        avg_similarities = np.mean(similarity_matrix, axis=1)
+        # Average similarity of each dataset within its category
+        category_indices = self._categories[category]
+        avg_similarities = self._category_similarities(category)
         
         # Get top recommendations
         top_indices = np.argsort(avg_similarities)[::-1][:n_recommendations]
         
         recommendations = []
         for idx in top_indices:
-            dataset = category_datasets[idx]
+            dataset = self.datasets[category_indices[idx]]
             recommendations.append(DatasetRecommendation(
                 dataset_id=dataset['id'],
                 title=dataset['title'],
@@ -144,4 +507,4 @@ class DatasetRecommender:
                 common_categories=[category]
             ))
             
-        return recommendations 
\ No newline at end of file
+        return recommendations 
@@ -0,0 +1,250 @@
+import os
+import json
+import uuid
+import shutil
+from typing import Callable, Dict, List, Optional
+from .enhancer import EnhancedMetadata, EnhancementResult, LLMEnhancer
+
+class BatchBackend:
+    """Base class for offline batch backends.
+
+    Job and result files use the OpenAI batch JSONL format: each job line holds
+    a ``custom_id`` and a chat-completion request ``body``; each result line
+    holds the same ``custom_id`` and a ``response`` (or an ``error``).
+    """
+
+    def submit(self, job_path: str) -> str:
+        """Submit a JSONL job file and return the batch id"""
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> str:
+        """Return 'pending', 'completed' or 'failed'"""
+        raise NotImplementedError
+
+    def download_results(self, batch_id: str, results_path: str) -> str:
+        """Write the batch results to ``results_path``"""
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """Submit jobs through the OpenAI Batch API"""
+
+    STATUS_MAP = {
+        'completed': 'completed',
+        'failed': 'failed',
+        'expired': 'failed',
+        'cancelled': 'failed'
+    }
+
+    def __init__(self, client, completion_window: str = '24h'):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, job_path: str) -> str:
+        with open(job_path, 'rb') as f:
+            input_file = self.client.files.create(file=f, purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self.client.batches.retrieve(batch_id)
+        return self.STATUS_MAP.get(batch.status, 'pending')
+
+    def download_results(self, batch_id: str, results_path: str) -> str:
+        batch = self.client.batches.retrieve(batch_id)
+        # Los resultados correctos y los fallidos llegan en ficheros separados;
+        # cualquiera de los dos puede no existir
+        with open(results_path, 'w', encoding='utf-8') as f:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    text = self.client.files.content(file_id).text
+                    f.write(text if text.endswith('\n') or not text else text + '\n')
+        return results_path
+
+
+class LocalFileBatchBackend(BatchBackend):
+    """File-based backend for tests and local runs.
+
+    Submitted jobs are copied to ``work_dir/<batch_id>/input.jsonl``. A batch is
+    completed once ``output.jsonl`` appears next to it, either written by an
+    external process or immediately by ``responder``, a callable that maps a
+    request body to the assistant's reply text.
+    """
+
+    def __init__(self, work_dir: str, responder: Optional[Callable[[Dict], str]] = None):
+        self.work_dir = work_dir
+        self.responder = responder
+        os.makedirs(work_dir, exist_ok=True)
+
+    def submit(self, job_path: str) -> str:
+        batch_id = f'local-{uuid.uuid4().hex[:12]}'
+        batch_dir = os.path.join(self.work_dir, batch_id)
+        os.makedirs(batch_dir)
+        shutil.copyfile(job_path, os.path.join(batch_dir, 'input.jsonl'))
+        if self.responder is not None:
+            self._respond(batch_dir)
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if os.path.exists(os.path.join(self.work_dir, batch_id, 'output.jsonl')):
+            return 'completed'
+        return 'pending'
+
+    def download_results(self, batch_id: str, results_path: str) -> str:
+        shutil.copyfile(os.path.join(self.work_dir, batch_id, 'output.jsonl'), results_path)
+        return results_path
+
+    def _respond(self, batch_dir: str):
+        with open(os.path.join(batch_dir, 'input.jsonl'), encoding='utf-8') as src, \
+                open(os.path.join(batch_dir, 'output.jsonl'), 'w', encoding='utf-8') as dst:
+            for line in src:
+                request = json.loads(line)
+                try:
+                    content = self.responder(request['body'])
+                    result = {'custom_id': request['custom_id'], 'error': None, 'response': {
+                        'status_code': 200,
+                        'body': {'choices': [{'message': {'role': 'assistant', 'content': content}}]}
+                    }}
+                except Exception as e:
+                    result = {'custom_id': request['custom_id'], 'response': None,
+                              'error': {'message': str(e)}}
+                dst.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+class BatchJob:
+    """Resumable offline enhancement job stored in ``job_dir``.
+
+    ``manifest.json`` records every submitted batch and whether its results
+    were collected; parsed results accumulate in ``enhanced.jsonl`` and
+    per-item errors in ``errors.jsonl``. Running ``submit`` again only sends
+    datasets that are neither enhanced nor pending (so failed items are
+    resubmitted), and ``collect`` only downloads batches that have not been
+    ingested yet.
+    """
+
+    def __init__(self, enhancer: LLMEnhancer, job_dir: str, backend: BatchBackend):
+        self.enhancer = enhancer
+        self.job_dir = job_dir
+        self.backend = backend
+        os.makedirs(job_dir, exist_ok=True)
+        self.manifest_path = os.path.join(job_dir, 'manifest.json')
+        self.enhanced_path = os.path.join(job_dir, 'enhanced.jsonl')
+        self.errors_path = os.path.join(job_dir, 'errors.jsonl')
+
+    def submit(self, datasets: List[Dict]) -> Optional[str]:
+        """Write and submit a job for datasets not yet enhanced or in flight"""
+        manifest = self._load_manifest()
+        done = set(self._load_enhanced())
+        in_flight = {dataset_id for batch in manifest['batches']
+                     if batch['status'] == 'pending' for dataset_id in batch['ids']}
+
+        todo = [d for d in datasets if str(d['id']) not in done and str(d['id']) not in in_flight]
+        if not todo:
+            return None
+
+        job_path = os.path.join(self.job_dir, f"job_{len(manifest['batches']):04d}.jsonl")
+        with open(job_path, 'w', encoding='utf-8') as f:
+            for dataset in todo:
+                f.write(json.dumps(self.enhancer.build_batch_request(dataset), ensure_ascii=False) + '\n')
+
+        batch_id = self.backend.submit(job_path)
+        manifest['batches'].append({
+            'batch_id': batch_id,
+            'job_path': job_path,
+            'ids': [str(d['id']) for d in todo],
+            'status': 'pending'
+        })
+        self._save_manifest(manifest)
+        return batch_id
+
+    def collect(self, datasets: List[Dict]) -> List[EnhancementResult]:
+        """Ingest finished batches and return one result per dataset"""
+        manifest = self._load_manifest()
+        for batch in manifest['batches']:
+            if batch['status'] != 'pending':
+                continue
+            status = self.backend.status(batch['batch_id'])
+            if status == 'completed':
+                results_path = os.path.join(self.job_dir, f"results_{batch['batch_id']}.jsonl")
+                self.backend.download_results(batch['batch_id'], results_path)
+                self._ingest(results_path, datasets)
+                batch['status'] = 'collected'
+            elif status == 'failed':
+                batch['status'] = 'failed'
+            else:
+                continue
+            # Guardar tras cada lote, para no volver a ingerirlo si falla uno posterior
+            self._save_manifest(manifest)
+
+        enhanced = self._load_enhanced()
+        errors = self._load_errors()
+        results = []
+        for dataset in datasets:
+            entry = enhanced.get(str(dataset['id']))
+            if entry is None:
+                results.append(EnhancementResult(dataset_id=dataset['id'], metadata=None,
+                                                 error=errors.get(str(dataset['id']),
+                                                                  'Batch result not available')))
+            else:
+                results.append(EnhancementResult(dataset_id=dataset['id'],
+                                                 metadata=EnhancedMetadata(**entry)))
+        return results
+
+    def _ingest(self, results_path: str, datasets: List[Dict]):
+        """Parse a results file, appending successful entries and per-item errors"""
+        by_id = {str(d['id']): d for d in datasets}
+        with open(results_path, encoding='utf-8') as src, \
+                open(self.enhanced_path, 'a', encoding='utf-8') as dst, \
+                open(self.errors_path, 'a', encoding='utf-8') as err:
+            for line in src:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                dataset = by_id.get(str(result.get('custom_id')))
+                if dataset is None:
+                    continue
+                try:
+                    metadata = self.enhancer.parse_batch_result(dataset, result)
+                except Exception as e:
+                    print(f"Error enhancing dataset {dataset['id']}: {str(e)}")
+                    err.write(json.dumps({'dataset_id': str(dataset['id']), 'error': str(e)},
+                                         ensure_ascii=False) + '\n')
+                    continue
+                dst.write(json.dumps(vars(metadata), ensure_ascii=False) + '\n')
+
+    def _load_enhanced(self) -> Dict[str, Dict]:
+        enhanced = {}
+        if os.path.exists(self.enhanced_path):
+            with open(self.enhanced_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        enhanced[str(entry['dataset_id'])] = entry
+        return enhanced
+
+    def _load_errors(self) -> Dict[str, str]:
+        """Last error of every dataset whose batch request failed"""
+        errors = {}
+        if os.path.exists(self.errors_path):
+            with open(self.errors_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        errors[entry['dataset_id']] = entry['error']
+        return errors
+
+    def _load_manifest(self) -> Dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {'batches': []}
+
+    def _save_manifest(self, manifest: Dict):
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
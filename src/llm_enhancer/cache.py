@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a prompt has no cached response"""
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of LLM responses.
+
+    Entries are keyed by a hash of the model, the messages and the sampling
+    parameters. They expire after ``ttl_seconds`` and the least recently used
+    ones are evicted once the cache exceeds ``max_size_bytes``. In replay
+    mode responses are served only from the cache, which makes offline runs
+    deterministic.
+    """
+
+    def __init__(self,
+                 cache_dir: str,
+                 ttl_seconds: Optional[float] = None,
+                 max_size_bytes: int = 100 * 1024 * 1024,
+                 replay: bool = False):
+        """
+        Args:
+            cache_dir: Directory where responses are stored
+            ttl_seconds: Lifetime of an entry (None keeps entries until evicted)
+            max_size_bytes: Maximum total size of the cache
+            replay: Serve only from the cache and fail on misses
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self.replay = replay
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_size = sum(entry.stat().st_size for entry in os.scandir(cache_dir)
+                               if entry.name.endswith('.json'))
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], params: Dict) -> str:
+        """Hash everything that determines the model's answer"""
+        payload = json.dumps({'model': model, 'messages': messages, 'params': params},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        if entry is not None and self.ttl_seconds is not None:
+            if time.time() - entry['created_at'] > self.ttl_seconds:
+                entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            if self.replay:
+                raise CacheMissError(f"No cached response for prompt {key}")
+            return None
+
+        # La fecha de modificación del fichero sirve como marca de uso para el LRU;
+        # si otro hilo lo ha desalojado ya, la respuesta leída sigue siendo válida
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return entry['content']
+
+    def put(self, key: str, content: str):
+        """Store a response and evict old entries if over budget"""
+        path = self._path(key)
+        data = json.dumps({'content': content, 'created_at': time.time()}, ensure_ascii=False)
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            self._total_size += os.path.getsize(path) - previous
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits its budget"""
+        entries = sorted((entry for entry in os.scandir(self.cache_dir)
+                          if entry.name.endswith('.json')),
+                         key=lambda entry: entry.stat().st_mtime)
+        self._total_size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._total_size <= self.max_size_bytes:
+                break
+            self._total_size -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
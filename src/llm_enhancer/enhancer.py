@@ -1,7 +1,13 @@
 import os
+import time
+import random
+import openai
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from openai import OpenAI
 from dataclasses import dataclass
+from .rate_limiter import RateLimiter
+from .cache import ResponseCache
 
 @dataclass
 class EnhancedMetadata:
@@ -12,35 +18,124 @@ class EnhancedMetadata:
     usage_examples: List[str]
     confidence_score: float
 
+class LLMResponseError(Exception):
+    """The LLM answer could not be parsed"""
+
+@dataclass
+class EnhancementResult:
+    dataset_id: str
+    metadata: Optional[EnhancedMetadata]
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.metadata is not None
+
 class LLMEnhancer:
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 max_concurrency: int = 4,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0,
+                 response_cache: Optional[ResponseCache] = None,
+                 pack_size: int = 1):
+        """
+        Initialize the LLM enhancer
+
+        Args:
+            api_key: OpenAI API key (optional, can be set via environment variable)
+            max_concurrency: Maximum number of in-flight requests in batch mode
+            requests_per_minute: Request rate limit (optional)
+            tokens_per_minute: Token rate limit (optional)
+            max_retries: Retries on rate-limit, 5xx and connection errors
+            backoff_base: Initial backoff delay in seconds
+            backoff_max: Maximum backoff delay in seconds
+            response_cache: On-disk cache of LLM responses (optional)
+            pack_size: Number of datasets sent per request in batch mode (capped so the
+                answer fits in the model's output token limit)
+        """
+        # Los reintentos los gestiona _chat_completion
+        self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'), max_retries=0)
         self.model = "gpt-4-turbo-preview"  # Using the latest GPT-4 model
+        self.temperature = 0.7
+        self.max_tokens = 1000
+        # Límite de tokens de salida del modelo y presupuesto por dataset en peticiones agrupadas
+        self.max_output_tokens = 4096
+        self.packed_item_tokens = 500
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.response_cache = response_cache
+        self.pack_size = max(1, min(pack_size, self.max_output_tokens // self.packed_item_tokens))
+
+    def _complete(self, messages: List[Dict], parse, max_tokens: Optional[int] = None):
+        """Get a parsed completion, serving it from the response cache when possible"""
+        max_tokens = max_tokens or self.max_tokens
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.make_key(
+                self.model, messages,
+                {'temperature': self.temperature, 'max_tokens': max_tokens}
+            )
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return parse(cached)
+
+        content = self._chat_completion(messages, max_tokens)
+        parsed = parse(content)
+        # Solo se guardan respuestas que se han podido interpretar
+        if key is not None:
+            self.response_cache.put(key, content)
+        return parsed
+
+    def _chat_completion(self, messages: List[Dict], max_tokens: int) -> str:
+        """Call the chat completion API with rate limiting and retry/backoff"""
+        # Estimación aproximada: ~4 caracteres por token
+        estimated_tokens = sum(len(m['content']) for m in messages) // 4 + max_tokens
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens
+                )
+                return response.choices[0].message.content
+            except (openai.RateLimitError, openai.InternalServerError,
+                    openai.APIConnectionError) as e:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff_delay(attempt, e))
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Exponential backoff with jitter, honouring Retry-After when present"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.backoff_max)
+        except ValueError:
+            pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
         
     def enhance_metadata(self, dataset: Dict) -> EnhancedMetadata:
         """Enhance dataset metadata using LLM"""
         prompt = self._create_enhancement_prompt(dataset)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            enhanced_data = self._parse_llm_response(response.choices[0].message.content)
-            return EnhancedMetadata(
-                dataset_id=dataset['id'],
-                improved_description=enhanced_data['description'],
-                suggested_tags=enhanced_data['tags'],
-                suggested_category=enhanced_data['category'],
-                usage_examples=enhanced_data['examples'],
-                confidence_score=enhanced_data['confidence']
-            )
+            enhanced_data = self._complete([
+                {"role": "system", "content": self._get_system_prompt()},
+                {"role": "user", "content": prompt}
+            ], self._parse_llm_response)
+            return self._build_metadata(dataset, enhanced_data)
             
         except Exception as e:
             raise Exception(f"Error enhancing metadata: {str(e)}")
@@ -63,6 +158,48 @@ class LLMEnhancer:
             "confidence": 0.95  // puntuación de confianza (0-1)
         }"""
     
+    def _get_packed_system_prompt(self) -> str:
+        """Get the system prompt for requests covering several datasets"""
+        return """Eres un experto en metadatos de datos abiertos. Tu tarea es mejorar la calidad de los metadatos 
+        de varios conjuntos de datos, proporcionando para cada uno:
+        1. Descripciones más detalladas y útiles
+        2. Etiquetas relevantes y específicas
+        3. Categorización precisa
+        4. Ejemplos de uso práctico
+        
+        Responde en formato JSON con una lista que contenga un objeto por conjunto de datos:
+        [
+            {
+                "dataset_id": "identificador indicado en la petición",
+                "description": "descripción mejorada",
+                "tags": ["tag1", "tag2", ...],
+                "category": "categoría sugerida",
+                "examples": ["ejemplo1", "ejemplo2", ...],
+                "confidence": 0.95  // puntuación de confianza (0-1)
+            },
+            ...
+        ]"""
+
+    def _create_packed_prompt(self, datasets: List[Dict]) -> str:
+        """Create a single prompt covering several datasets"""
+        blocks = []
+        for dataset in datasets:
+            blocks.append(f"""
+        ID: {dataset.get('id', '')}
+        Título: {dataset.get('title', '')}
+        Descripción actual: {dataset.get('description', '')}
+        Formato: {dataset.get('format', '')}
+        Categoría actual: {dataset.get('category', '')}
+        Etiquetas actuales: {', '.join(dataset.get('tags', []))}""")
+        return f"""Por favor, mejora los metadatos de los siguientes conjuntos de datos:
+        {''.join(blocks)}
+        
+        Considera:
+        1. El contexto de datos abiertos de Madrid
+        2. Posibles casos de uso
+        3. Relevancia para ciudadanos y empresas
+        4. Mejores prácticas en metadatos"""
+    
     def _create_enhancement_prompt(self, dataset: Dict) -> str:
         """Create the prompt for metadata enhancement"""
         return f"""Por favor, mejora los metadatos del siguiente conjunto de datos:
@@ -79,31 +216,160 @@ class LLMEnhancer:
         3. Relevancia para ciudadanos y empresas
         4. Mejores prácticas en metadatos"""
     
-    def _parse_llm_response(self, response: str) -> Dict:
-        """Parse the LLM response into structured data"""
+    def _parse_llm_response(self, response: str, dataset_ids: Optional[List[str]] = None) -> Dict:
+        """Parse the LLM response into structured data
+
+        When ``dataset_ids`` is given the response is a packed JSON array and the
+        result maps each dataset id to its parsed entry. Entries that are missing,
+        malformed or not requested are left out.
+        """
         try:
             import json
             data = json.loads(response)
-            return {
-                'description': data.get('description', ''),
-                'tags': data.get('tags', []),
-                'category': data.get('category', ''),
-                'examples': data.get('examples', []),
-                'confidence': float(data.get('confidence', 0.0))
-            }
         except Exception as e:
-            raise Exception(f"Error parsing LLM response: {str(e)}")
+            raise LLMResponseError(f"Error parsing LLM response: {str(e)}")
+
+        if dataset_ids is None:
+            try:
+                return self._parse_item(data)
+            except Exception as e:
+                raise LLMResponseError(f"Error parsing LLM response: {str(e)}")
+
+        if isinstance(data, dict):
+            data = data.get('datasets', [])
+        if not isinstance(data, list):
+            raise LLMResponseError("Error parsing LLM response: expected a JSON array")
+
+        wanted = set(dataset_ids)
+        parsed = {}
+        for item in data:
+            try:
+                dataset_id = str(item['dataset_id'])
+                if dataset_id in wanted:
+                    parsed[dataset_id] = self._parse_item(item)
+            except Exception:
+                continue
+        if not parsed:
+            raise LLMResponseError("Error parsing LLM response: no valid dataset entries")
+        return parsed
+
+    def _parse_item(self, data: Dict) -> Dict:
+        return {
+            'description': data.get('description', ''),
+            'tags': data.get('tags', []),
+            'category': data.get('category', ''),
+            'examples': data.get('examples', []),
+            'confidence': float(data.get('confidence', 0.0))
+        }
+
+    def enhance_packed(self, datasets: List[Dict]) -> List[EnhancementResult]:
+        """Enhance several datasets with a single request
+
+        Datasets missing from the answer, or the whole pack if the request fails,
+        fall back to one request per dataset.
+        """
+        if len(datasets) == 1:
+            return [self._enhance_result(datasets[0])]
+
+        dataset_ids = [str(dataset['id']) for dataset in datasets]
+        try:
+            parsed = self._complete(
+                [
+                    {"role": "system", "content": self._get_packed_system_prompt()},
+                    {"role": "user", "content": self._create_packed_prompt(datasets)}
+                ],
+                lambda content: self._parse_llm_response(content, dataset_ids),
+                max_tokens=min(self.packed_item_tokens * len(datasets), self.max_output_tokens)
+            )
+        except Exception as e:
+            # Cualquier fallo (también CacheMissError en modo replay) se reintenta dataset a dataset
+            print(f"Error enhancing a pack of {len(datasets)} datasets, retrying one by one: {str(e)}")
+            parsed = {}
+
+        results = []
+        for dataset, dataset_id in zip(datasets, dataset_ids):
+            enhanced_data = parsed.get(dataset_id)
+            if enhanced_data is None:
+                results.append(self._enhance_result(dataset))
+                continue
+            results.append(EnhancementResult(
+                dataset_id=dataset['id'],
+                metadata=self._build_metadata(dataset, enhanced_data)
+            ))
+        return results
+
+    def build_batch_request(self, dataset: Dict) -> Dict:
+        """Build the batch job line (OpenAI batch format) for a dataset"""
+        return {
+            'custom_id': str(dataset['id']),
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': self.model,
+                'messages': [
+                    {"role": "system", "content": self._get_system_prompt()},
+                    {"role": "user", "content": self._create_enhancement_prompt(dataset)}
+                ],
+                'temperature': self.temperature,
+                'max_tokens': self.max_tokens
+            }
+        }
+
+    def parse_batch_result(self, dataset: Dict, result: Dict) -> EnhancedMetadata:
+        """Turn a batch result line back into EnhancedMetadata"""
+        if result.get('error'):
+            raise Exception(f"Batch request failed: {result['error']}")
+        response = result.get('response') or {}
+        if response.get('status_code') != 200:
+            raise Exception(f"Batch request failed with status {response.get('status_code')}")
+        content = response['body']['choices'][0]['message']['content']
+        return self._build_metadata(dataset, self._parse_llm_response(content))
+
+    def _build_metadata(self, dataset: Dict, enhanced_data: Dict) -> EnhancedMetadata:
+        return EnhancedMetadata(
+            dataset_id=dataset['id'],
+            improved_description=enhanced_data['description'],
+            suggested_tags=enhanced_data['tags'],
+            suggested_category=enhanced_data['category'],
+            usage_examples=enhanced_data['examples'],
+            confidence_score=enhanced_data['confidence']
+        )
     
+    def batch_enhance_results(self, datasets: List[Dict]) -> List[EnhancementResult]:
+        """Enhance multiple datasets concurrently, returning one result per item"""
+        packs = [datasets[i:i + self.pack_size] for i in range(0, len(datasets), self.pack_size)]
+        if self.max_concurrency == 1 or len(packs) <= 1:
+            results = [self.enhance_packed(pack) for pack in packs]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                results = list(executor.map(self.enhance_packed, packs))
+        return [result for pack_results in results for result in pack_results]
+
+    def _enhance_result(self, dataset: Dict) -> EnhancementResult:
+        try:
+            return EnhancementResult(dataset_id=dataset['id'], metadata=self.enhance_metadata(dataset))
+        except Exception as e:
+            return EnhancementResult(dataset_id=dataset.get('id', ''), metadata=None, error=str(e))
+
     def batch_enhance(self, datasets: List[Dict]) -> List[EnhancedMetadata]:
-        """Enhance metadata for multiple datasets"""
-        return [self.enhance_metadata(dataset) for dataset in datasets]
+        """Enhance metadata for multiple datasets, skipping the ones that fail"""
+        enhanced = []
+        for result in self.batch_enhance_results(datasets):
+            if result.success:
+                enhanced.append(result.metadata)
+            else:
+                print(f"Error enhancing dataset {result.dataset_id}: {result.error}")
+        return enhanced
     
     def get_enhancement_summary(self, enhanced_metadata: List[EnhancedMetadata]) -> Dict:
         """Generate a summary of metadata enhancements"""
+        total = len(enhanced_metadata)
         return {
-            'total_enhanced': len(enhanced_metadata),
-            'average_confidence': sum(m.confidence_score for m in enhanced_metadata) / len(enhanced_metadata),
+            'total_enhanced': total,
+            'average_confidence': sum(m.confidence_score for m in enhanced_metadata) / total if total else 0.0,
             'categories_suggested': len(set(m.suggested_category for m in enhanced_metadata)),
             'total_tags_suggested': sum(len(m.suggested_tags) for m in enhanced_metadata),
-            'total_examples_generated': sum(len(m.usage_examples) for m in enhanced_metadata)
+            'total_examples_generated': sum(len(m.usage_examples) for m in enhanced_metadata),
+            'cache_hits': self.response_cache.hits if self.response_cache else 0,
+            'cache_misses': self.response_cache.misses if self.response_cache else 0
         } 
\ No newline at end of file
@@ -0,0 +1,58 @@
+import time
+import threading
+from typing import Optional
+
+class RateLimiter:
+    """Thread-safe token-bucket limiter for requests and tokens per minute"""
+
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        """
+        Args:
+            requests_per_minute: Maximum requests per minute (None for unlimited)
+            tokens_per_minute: Maximum tokens per minute (None for unlimited)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_budget = requests_per_minute or 0.0
+        self._token_budget = tokens_per_minute or 0.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        """Block until a request consuming ``tokens`` tokens is allowed"""
+        while True:
+            with self._lock:
+                self._refill()
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    if self.requests_per_minute:
+                        self._request_budget -= 1
+                    if self.tokens_per_minute:
+                        self._token_budget -= tokens
+                    return
+            time.sleep(wait)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_budget = min(self.requests_per_minute,
+                                       self._request_budget + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._token_budget = min(self.tokens_per_minute,
+                                     self._token_budget + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_time(self, tokens: int) -> float:
+        """Seconds until both buckets hold enough budget"""
+        wait = 0.0
+        if self.requests_per_minute and self._request_budget < 1:
+            wait = max(wait, (1 - self._request_budget) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            # Una petición mayor que el cubo completo se deja pasar con el cubo lleno
+            needed = min(tokens, self.tokens_per_minute)
+            if self._token_budget < needed:
+                wait = max(wait, (needed - self._token_budget) * 60 / self.tokens_per_minute)
+        return wait
@@ -1,57 +1,106 @@
+import threading
 import requests
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
 from datetime import datetime
-
-@dataclass
-class DatasetMetadata:
-    id: str
-    title: str
-    description: str
-    format: str
-    license: str
-    frequency: str
-    category: str
-    tags: List[str]
-    last_updated: datetime
-    url: str
+from .sources import CatalogSource
+from .http_cache import HTTPCache
+from .rules import DATASET_RULES
+from .store import MISSING_TIMESTAMP, DatasetMetadata, DatasetStore
 
 class MetadataAnalyzer:
-    def __init__(self, catalog_url: str):
+    # Lista de endpoints de datasets conocidos
+    DATASET_ENDPOINTS = [
+        '300396-12600740-mobiliario-urbano-deportivos',
+        '300680-12600968-servicios-sociales-problematicas',
+        '300584-2083621-rrhh_efectivos',
+        '300392-12751124-meteorologia-tiempo-real',
+        '300468-12600980-tarjeta-azul',
+        '212411-12601927-madrid-avisa',
+        '212411-12601936-madrid-avisa',
+        '300217-12600700-mobiliario-mesas',
+        '210980-2083617-cita-previa-linea-madrid',
+        '300395-12600760-mobiliario-urbano-mayores'
+    ]
+
+    def __init__(self,
+                 catalog_url: str,
+                 source: Optional[CatalogSource] = None,
+                 http_cache: Optional[HTTPCache] = None,
+                 max_workers: int = 16,
+                 max_per_host: int = 8,
+                 timeout: float = 30.0):
+        """
+        Initialize the metadata analyzer
+
+        Args:
+            catalog_url: URL of the Madrid open data catalog
+            source: Catalog source to read datasets from (defaults to the known endpoint list)
+            http_cache: Conditional-request cache for per-dataset JSON (optional)
+            max_workers: Number of concurrent fetch workers (1 fetches sequentially)
+            max_per_host: Maximum number of in-flight requests per host
+            timeout: Timeout in seconds for each HTTP request
+        """
         self.catalog_url = catalog_url
-        self.datasets: List[DatasetMetadata] = []
-        
-    def fetch_catalog(self) -> Dict:
-        """Fetch the catalog from datos.madrid.es"""
+        self.source = source
+        self.http_cache = http_cache
+        self.datasets = DatasetStore()
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+
+        # Sesión compartida con keep-alive para reutilizar conexiones TCP/TLS
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers,
+                              pool_maxsize=self.max_per_host)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_limits_lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """Get the concurrency limiter for the host of a URL"""
+        host = urlparse(url).netloc
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def _fetch_dataset(self, endpoint: str) -> Optional[Dict]:
+        """Fetch a single dataset's JSON, returning None on failure"""
+        url = f'https://datos.madrid.es/egob/catalogo/{endpoint}.json'
         try:
-            # Lista de endpoints de datasets conocidos
-            dataset_endpoints = [
-                '300396-12600740-mobiliario-urbano-deportivos',
-                '300680-12600968-servicios-sociales-problematicas',
-                '300584-2083621-rrhh_efectivos',
-                '300392-12751124-meteorologia-tiempo-real',
-                '300468-12600980-tarjeta-azul',
-                '212411-12601927-madrid-avisa',
-                '212411-12601936-madrid-avisa',
-                '300217-12600700-mobiliario-mesas',
-                '210980-2083617-cita-previa-linea-madrid',
-                '300395-12600760-mobiliario-urbano-mayores'
-            ]
-            
-            all_datasets = []
-            for endpoint in dataset_endpoints:
-                url = f'https://datos.madrid.es/egob/catalogo/{endpoint}.json'
-                try:
-                    response = requests.get(url)
+            with self._host_semaphore(url):
+                if self.http_cache is not None:
+                    data = self.http_cache.get_json(self.session, url, self.timeout)
+                else:
+                    response = self.session.get(url, timeout=self.timeout)
                     response.raise_for_status()
                     data = response.json()
-                    if isinstance(data, dict):
-                        all_datasets.append(data)
-                except Exception as e:
-                    print(f"Error fetching dataset {endpoint}: {str(e)}")
-                    continue
-            
+            if isinstance(data, dict):
+                return data
+        except Exception as e:
+            print(f"Error fetching dataset {endpoint}: {str(e)}")
+        return None
+
+    def fetch_catalog(self, endpoints: Optional[List[str]] = None) -> Dict:
+        """Fetch the catalog from datos.madrid.es"""
+        try:
+            dataset_endpoints = endpoints if endpoints is not None else self.DATASET_ENDPOINTS
+
+            if self.max_workers == 1:
+                results = [self._fetch_dataset(endpoint) for endpoint in dataset_endpoints]
+            else:
+                # executor.map conserva el orden de los endpoints
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    results = list(executor.map(self._fetch_dataset, dataset_endpoints))
+
+            all_datasets = [data for data in results if data is not None]
             return {'datasets': all_datasets}
                 
         except Exception as e:
@@ -63,11 +112,11 @@ class MetadataAnalyzer:
         title = dataset_data.get('title', '')
         description = dataset_data.get('description', '')
         
-        # Intentar extraer la fecha de actualización
+        # Intentar extraer la fecha de actualización (None si falta o no es válida)
         try:
             last_updated = datetime.fromisoformat(dataset_data.get('modified', ''))
         except (ValueError, TypeError):
-            last_updated = datetime.now()
+            last_updated = None
             
         # Extraer categoría y tags
         category = dataset_data.get('category', '')
@@ -100,28 +149,63 @@ class MetadataAnalyzer:
             url=url
         )
     
+    def iter_datasets(self) -> Iterator[DatasetMetadata]:
+        """Stream parsed datasets from the configured catalog source"""
+        if self.source is None:
+            records = iter(self.fetch_catalog().get('datasets', []))
+        else:
+            records = self.source.iter_records()
+        for record in records:
+            yield self.parse_dataset(record)
+
+    def load_catalog(self) -> DatasetStore:
+        """Parse the whole catalog into the compact dataset store"""
+        self.datasets = DatasetStore(self.iter_datasets())
+        return self.datasets
+
     def analyze_metadata(self) -> pd.DataFrame:
         """Analyze all datasets in the catalog"""
-        catalog = self.fetch_catalog()
-        self.datasets = [self.parse_dataset(dataset) for dataset in catalog.get('datasets', [])]
-        
-        analysis_results = []
-        for dataset in self.datasets:
-            analysis = {
-                'id': dataset.id,
-                'title_length': len(dataset.title),
-                'description_length': len(dataset.description),
-                'has_description': bool(dataset.description.strip()),
-                'has_category': bool(dataset.category),
-                'num_tags': len(dataset.tags),
-                'format_score': self._score_format(dataset.format),
-                'license_score': self._score_license(dataset.license),
-                'frequency_score': self._score_frequency(dataset.frequency),
-                'days_since_update': (datetime.now() - dataset.last_updated).days
-            }
-            analysis_results.append(analysis)
-        
-        return pd.DataFrame(analysis_results)
+        return self.analyze_datasets(self.load_catalog())
+
+    def analyze_datasets(self, datasets) -> pd.DataFrame:
+        """Analyze a DatasetStore (or a list of parsed datasets) column-wise"""
+        store = datasets if isinstance(datasets, DatasetStore) else DatasetStore(datasets)
+        n = len(store)
+
+        # Las puntuaciones se calculan una vez por valor distinto y se expanden por código
+        def per_value(field, score):
+            values = store.vocabularies[field].values
+            return np.array([score(v) for v in values], dtype=float)[store.codes(field)]
+
+        has_category = np.array([bool(v) for v in store.vocabularies['category'].values],
+                                dtype=bool)[store.codes('category')]
+
+        return pd.DataFrame({
+            'id': store.ids,
+            'title_length': np.fromiter(map(len, store.titles), dtype=np.int64, count=n),
+            'description_length': np.fromiter(map(len, store.descriptions), dtype=np.int64, count=n),
+            'has_description': np.fromiter((bool(d.strip()) for d in store.descriptions),
+                                           dtype=bool, count=n),
+            'has_category': has_category,
+            'num_tags': store.tag_counts(),
+            'format_score': per_value('format', self._score_format),
+            'license_score': per_value('license', self._score_license),
+            'frequency_score': per_value('frequency', self._score_frequency),
+            'days_since_update': self._days_since_update(store)
+        })
+
+    def analyze_update_dates(self, datasets) -> pd.DataFrame:
+        """Only the columns of ``analyze_datasets`` that depend on the current date"""
+        store = datasets if isinstance(datasets, DatasetStore) else DatasetStore(datasets)
+        return pd.DataFrame({'id': store.ids, 'days_since_update': self._days_since_update(store)})
+
+    @staticmethod
+    def _days_since_update(store: DatasetStore) -> np.ndarray:
+        timestamps = store.timestamps()
+        days = (DatasetStore.to_timestamp(datetime.now()) - timestamps) // 86_400_000_000
+        # Sin fecha conocida no se considera desactualizado
+        days[timestamps == MISSING_TIMESTAMP] = 0
+        return days
     
     def _score_format(self, format_str: str) -> float:
         """Score the dataset format (higher is better)"""
@@ -158,31 +242,16 @@ class MetadataAnalyzer:
         }
         return frequency_scores.get(frequency.lower(), 0.5)
     
-    def get_problematic_datasets(self) -> List[Dict]:
+    def get_problematic_datasets(self, datasets: Optional[List[DatasetMetadata]] = None) -> List[Dict]:
         """Identify datasets with common metadata problems"""
-        problems = []
-        for dataset in self.datasets:
-            dataset_problems = []
-            
-            if not dataset.description.strip():
-                dataset_problems.append("Sin descripción")
-            elif len(dataset.description) < 50:
-                dataset_problems.append("Descripción demasiado corta")
-                
-            if not dataset.category:
-                dataset_problems.append("Sin categoría")
-                
-            if len(dataset.tags) < 3:
-                dataset_problems.append("Pocas etiquetas")
-                
-            if dataset.format.upper() not in ['CSV', 'JSON', 'XML']:
-                dataset_problems.append("Formato poco reutilizable")
-                
-            if dataset_problems:
-                problems.append({
-                    'id': dataset.id,
-                    'title': dataset.title,
-                    'problems': dataset_problems
-                })
-                
-        return problems 
\ No newline at end of file
+        datasets = self.datasets if datasets is None else datasets
+        store = datasets if isinstance(datasets, DatasetStore) else DatasetStore(datasets)
+        frame = pd.DataFrame({
+            'id': store.ids,
+            'title': store.titles,
+            'description': store.descriptions,
+            'category': store.column('category'),
+            'num_tags': store.tag_counts(),
+            'format': store.column('format')
+        })
+        return DATASET_RULES.problematic_rows(frame, {'id': 'id', 'title': 'title'})
@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+import pandas as pd
+from typing import Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # Sin pyarrow se lee siempre el CSV
+    pa = None
+
+
+def parse_catalog_dates(values: pd.Series) -> pd.Series:
+    """Parse a date column of ``catalogo.csv``
+
+    Dates are ISO 8601 (``2023-05-04``); values in the Spanish ``dd/mm/yyyy``
+    form are read day-first. Anything else becomes NaT.
+    """
+    text = values.astype('string').str.strip()
+    dates = pd.to_datetime(text, errors='coerce', format='ISO8601')
+    # Las que no son ISO se interpretan como dd/mm/aaaa (con o sin hora)
+    rest = dates.isna() & text.str.contains('/', regex=False, na=False)
+    if rest.any():
+        dates[rest] = pd.to_datetime(text[rest].str.slice(0, 10), errors='coerce', format='%d/%m/%Y')
+    return dates
+
+
+class CatalogCache:
+    """Columnar (Feather/Arrow IPC) cache of the portal's ``catalogo.csv``.
+
+    The latin1, semicolon-delimited CSV is parsed once into an uncompressed
+    Arrow IPC file with every column stored as text, so later runs can
+    memory-map it and read only the columns they need. The cache is reused
+    while the CSV's size and mtime match; if only the mtime changed, the
+    content hash decides. Without pyarrow every call falls back to reading the
+    CSV.
+    """
+
+    def __init__(self,
+                 csv_path: str = 'catalogo.csv',
+                 cache_path: Optional[str] = None,
+                 delimiter: str = ';',
+                 encoding: str = 'latin1',
+                 batch_size: int = 5000):
+        self.csv_path = csv_path
+        self.cache_path = cache_path or os.path.splitext(csv_path)[0] + '.feather'
+        self.meta_path = f'{self.cache_path}.meta.json'
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.batch_size = batch_size
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load the whole catalog, restricted to ``columns`` if given"""
+        if not self.ensure():
+            return pd.read_csv(self.csv_path, delimiter=self.delimiter, encoding=self.encoding,
+                               dtype=str, usecols=self._usecols(columns))
+        with pa.memory_map(self.cache_path) as source:
+            table = ipc.open_file(source).read_all()
+            return table.select(self._present(table.schema.names, columns)).to_pandas()
+
+    def iter_chunks(self, columns: Optional[List[str]] = None,
+                    chunksize: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Yield the catalog in chunks, restricted to ``columns`` if given"""
+        chunksize = chunksize or self.batch_size
+        if not self.ensure():
+            yield from pd.read_csv(self.csv_path, delimiter=self.delimiter, encoding=self.encoding,
+                                   dtype=str, usecols=self._usecols(columns), chunksize=chunksize)
+            return
+        with pa.memory_map(self.cache_path) as source:
+            table = ipc.open_file(source).read_all()
+            table = table.select(self._present(table.schema.names, columns))
+            # Los cortes de una tabla mapeada en memoria no copian datos
+            for offset in range(0, table.num_rows, chunksize):
+                frame = table.slice(offset, chunksize).to_pandas()
+                frame.index = pd.RangeIndex(offset, offset + len(frame))
+                yield frame
+
+    def ensure(self) -> bool:
+        """Make sure the cache is up to date; False if no cache can be used"""
+        if pa is None:
+            return False
+        stat = os.stat(self.csv_path)
+        meta = self._load_meta()
+        if meta and os.path.exists(self.cache_path):
+            if meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns:
+                return True
+            # Cambió la fecha de modificación: comprobar si cambió el contenido
+            digest = self._hash()
+            if digest == meta['sha256']:
+                self._save_meta(stat, digest)
+                return True
+            self._build(stat, digest)
+            return True
+        self._build(stat, self._hash())
+        return True
+
+    def _build(self, stat: os.stat_result, digest: str):
+        """Convert the CSV into the Arrow IPC cache file"""
+        tmp_path = f'{self.cache_path}.tmp'
+        reader = pd.read_csv(self.csv_path, delimiter=self.delimiter, encoding=self.encoding,
+                             dtype=str, chunksize=self.batch_size)
+        writer = None
+        try:
+            for chunk in reader:
+                if writer is None:
+                    schema = pa.schema([(str(name), pa.string()) for name in chunk.columns])
+                    writer = ipc.new_file(tmp_path, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            return
+        os.replace(tmp_path, self.cache_path)
+        self._save_meta(stat, digest)
+
+    def _hash(self) -> str:
+        digest = hashlib.sha256()
+        with open(self.csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _load_meta(self) -> Optional[dict]:
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, stat: os.stat_result, digest: str):
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}, f)
+
+    @staticmethod
+    def _present(names: List[str], columns: Optional[List[str]]) -> List[str]:
+        return list(names) if columns is None else [c for c in columns if c in names]
+
+    @staticmethod
+    def _usecols(columns: Optional[List[str]]):
+        return None if columns is None else (lambda column: column in columns)
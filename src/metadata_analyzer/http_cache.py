@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from typing import Dict, Optional
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a URL has no cached response"""
+
+
+class HTTPCache:
+    """On-disk HTTP response cache using ETag/Last-Modified revalidation.
+
+    Each URL is stored as a body file plus a small JSON metadata file holding
+    its validators. Cached entries are revalidated with conditional requests,
+    so unchanged resources come back as ``304 Not Modified`` and are served
+    from disk. The least recently used entries are evicted once the cache
+    grows past ``max_size_bytes``.
+    """
+
+    def __init__(self,
+                 cache_dir: str,
+                 max_size_bytes: int = 200 * 1024 * 1024,
+                 offline: bool = False):
+        """
+        Args:
+            cache_dir: Directory where responses are stored
+            max_size_bytes: Maximum total size of cached bodies
+            offline: Serve only from the cache, never touching the network
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.offline = offline
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stale': 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def get_json(self, session: requests.Session, url: str, timeout: Optional[float] = None):
+        """Fetch a URL as JSON, going through the cache"""
+        return json.loads(self.get(session, url, timeout))
+
+    def get(self, session: requests.Session, url: str, timeout: Optional[float] = None) -> bytes:
+        """Fetch a URL's body, revalidating any cached copy"""
+        key = self._key(url)
+        with self._lock:
+            entry = self._index.get(key)
+
+        if self.offline:
+            body = self._read_hit(key, 'hits') if entry is not None else None
+            if body is None:
+                raise CacheMissError(f"No cached response for {url}")
+            return body
+
+        if entry is not None:
+            body = self._revalidate(session, url, key, entry, timeout)
+            if body is not None:
+                return body
+
+        # Sin copia en caché (o desalojada mientras tanto): petición sin validadores
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+        if response.status_code == 304:
+            raise requests.HTTPError(f"Unexpected 304 Not Modified for {url}", response=response)
+        self._store(key, url, response)
+        return response.content
+
+    def _revalidate(self, session: requests.Session, url: str, key: str, entry: Dict,
+                    timeout: Optional[float]) -> Optional[bytes]:
+        """Conditional request for a cached URL; None if the cached body is gone"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304:
+                return self._read_hit(key, 'revalidated')
+            response.raise_for_status()
+        except requests.RequestException as e:
+            # Si el portal no responde, servir la copia en caché si existe
+            status = getattr(e.response, 'status_code', None)
+            if status is None or status >= 500:
+                body = self._read_hit(key, 'stale')
+                if body is not None:
+                    return body
+            raise
+
+        self._store(key, url, response)
+        return response.content
+
+    def _read_hit(self, key: str, stat: str) -> Optional[bytes]:
+        """Read a cached body, or None if it was evicted in the meantime"""
+        # Bajo el lock, para que otro hilo no lo desaloje durante la lectura
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            try:
+                with open(self._body_path(key), 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                del self._index[key]
+                return None
+            self.stats[stat] += 1
+            entry['last_access'] = time.time()
+            self._write_meta(key, entry)
+        return body
+
+    def _store(self, key: str, url: str, response: requests.Response):
+        body = response.content
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': len(body),
+            'last_access': time.time()
+        }
+        with self._lock:
+            self.stats['misses'] += 1
+            with open(self._body_path(key), 'wb') as f:
+                f.write(body)
+            self._write_meta(key, entry)
+            self._index[key] = entry
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its budget"""
+        total = sum(entry['size'] for entry in self._index.values())
+        if total <= self.max_size_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_size_bytes:
+                break
+            for path in (self._body_path(key), self._meta_path(key)):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= entry['size']
+            del self._index[key]
+
+    def _load_index(self) -> Dict[str, Dict]:
+        index = {}
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.meta.json'):
+                continue
+            key = filename[:-len('.meta.json')]
+            if not os.path.exists(self._body_path(key)):
+                continue
+            try:
+                with open(self._meta_path(key), encoding='utf-8') as f:
+                    index[key] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return index
+
+    def _write_meta(self, key: str, entry: Dict):
+        with open(self._meta_path(key), 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.body')
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.meta.json')
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+@dataclass
+class Rule:
+    message: str
+    predicate: Callable[[pd.DataFrame], pd.Series]  # True where the problem applies
+
+class RuleSet:
+    """Declarative metadata problem rules evaluated column-wise over a whole frame"""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = list(rules)
+
+    @property
+    def messages(self) -> List[str]:
+        return [rule.message for rule in self.rules]
+
+    def evaluate(self, df: pd.DataFrame) -> np.ndarray:
+        """Return a (rows x rules) boolean matrix of triggered rules"""
+        if not self.rules:
+            return np.zeros((len(df), 0), dtype=bool)
+        return np.column_stack([
+            np.asarray(rule.predicate(df), dtype=bool).reshape(len(df))
+            for rule in self.rules
+        ])
+
+    def problematic_rows(self, df: pd.DataFrame, columns: Dict[str, str]) -> List[Dict]:
+        """Return one dict per row with at least one problem
+
+        ``columns`` maps output keys to frame columns; the messages go under
+        ``'problems'``.
+        """
+        if df.empty:
+            return []
+        masks = self.evaluate(df)
+        flagged = np.flatnonzero(masks.any(axis=1))
+        messages = np.array(self.messages, dtype=object)
+        values = {key: df[column].to_numpy()[flagged] for key, column in columns.items()}
+        return [
+            {**{key: values[key][n] for key in columns}, 'problems': messages[masks[i]].tolist()}
+            for n, i in enumerate(flagged)
+        ]
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    """Column as stripped strings, NaN where the value is not a string"""
+    values = df.get(column)
+    if values is None or not (pd.api.types.is_object_dtype(values.dtype)
+                               or pd.api.types.is_string_dtype(values.dtype)):
+        return pd.Series(np.nan, index=df.index, dtype=object)
+    # El accesor .str devuelve NaN para los valores que no son texto
+    return values.str.strip()
+
+def missing_text(column: str) -> Callable[[pd.DataFrame], pd.Series]:
+    """Value is not a string or is blank"""
+    return lambda df: _text(df, column).fillna('').eq('')
+
+def text_shorter_than(column: str, length: int) -> Callable[[pd.DataFrame], pd.Series]:
+    """Value is not a string or its stripped text is shorter than ``length``"""
+    return lambda df: _text(df, column).fillna('').str.len() < length
+
+def fewer_items_than(column: str, count: int, sep: str = ',') -> Callable[[pd.DataFrame], pd.Series]:
+    """Value is not a string or splits into fewer than ``count`` items"""
+    def predicate(df: pd.DataFrame) -> pd.Series:
+        text = _text(df, column)
+        items = text.fillna('').str.count(sep) + 1
+        return text.isna() | (items < count)
+    return predicate
+
+def less_than(column: str, value: float) -> Callable[[pd.DataFrame], pd.Series]:
+    return lambda df: df[column] < value
+
+def not_in(column: str, allowed: Sequence[str]) -> Callable[[pd.DataFrame], pd.Series]:
+    """Upper-cased value not among ``allowed``"""
+    return lambda df: ~df[column].fillna('').astype(str).str.upper().isin(allowed)
+
+
+# Reglas sobre los metadatos parseados (MetadataAnalyzer)
+DATASET_RULES = RuleSet([
+    Rule("Sin descripción", missing_text('description')),
+    Rule("Descripción demasiado corta", lambda df: ~missing_text('description')(df)
+         & (df['description'].str.len() < 50)),
+    Rule("Sin categoría", lambda df: df['category'].fillna('').eq('')),
+    Rule("Pocas etiquetas", less_than('num_tags', 3)),
+    Rule("Formato poco reutilizable", not_in('format', ['CSV', 'JSON', 'XML']))
+])
+
+# Reglas sobre las columnas de catalogo.csv
+CSV_CATALOG_RULES = RuleSet([
+    Rule('Nombre muy corto o vacío', text_shorter_than('Nombre', 5)),
+    Rule('Sin sector', missing_text('Sector')),
+    Rule('Pocas palabras clave', fewer_items_than('Palabras clave:', 3)),
+    Rule('Sin licencia', missing_text('Licencia:')),
+    Rule('Sin frecuencia', missing_text('Frecuencia de actualización:')),
+    Rule('Pocos formatos', fewer_items_than('Formatos', 2))
+])
@@ -0,0 +1,193 @@
+import os
+import json
+import requests
+import pandas as pd
+from typing import Dict, Iterator, List, Optional
+from .catalog_cache import CatalogCache, parse_catalog_dates
+
+class CatalogSource:
+    """Base class for catalog sources.
+
+    A source yields raw dataset records as dicts using the keys understood by
+    ``MetadataAnalyzer.parse_dataset`` (id, title, description, format, license,
+    frequency, category, tags, modified, url).
+    """
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Yield raw dataset records one at a time"""
+        raise NotImplementedError
+
+
+class CSVCatalogSource(CatalogSource):
+    """Read the portal's ``catalogo.csv`` export in chunks (through CatalogCache)"""
+
+    # Columnas de catalogo.csv -> claves de parse_dataset
+    COLUMN_MAP = {
+        'title': 'Nombre',
+        'description': 'Descripción',
+        'category': 'Sector',
+        'tags': 'Palabras clave:',
+        'format': 'Formatos',
+        'license': 'Licencia:',
+        'frequency': 'Frecuencia de actualización:',
+        'url': 'URL'
+    }
+    UPDATED_COLUMN = 'Fecha de actualización:'
+    CREATED_COLUMN = 'Fecha de incorporación al catálogo:'
+
+    def __init__(self,
+                 csv_path: str = 'catalogo.csv',
+                 chunksize: int = 5000,
+                 delimiter: str = ';',
+                 encoding: str = 'latin1'):
+        self.csv_path = csv_path
+        self.chunksize = chunksize
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Yield one record per CSV row, reading ``chunksize`` rows at a time"""
+        cache = CatalogCache(self.csv_path, delimiter=self.delimiter, encoding=self.encoding)
+        for chunk in cache.iter_chunks(chunksize=self.chunksize):
+            yield from self._chunk_records(chunk)
+
+    def _chunk_records(self, chunk: pd.DataFrame) -> Iterator[Dict]:
+        """Normalize a chunk of CSV rows into raw dataset records"""
+        columns = {key: self._text_column(chunk, column)
+                   for key, column in self.COLUMN_MAP.items()}
+
+        # Usar fecha de actualización si existe, sino usar fecha de incorporación
+        updated = self._date_column(chunk, self.UPDATED_COLUMN)
+        created = self._date_column(chunk, self.CREATED_COLUMN)
+        modified = updated.fillna(created)
+        modified = modified.dt.strftime('%Y-%m-%dT%H:%M:%S').fillna('')
+
+        # Los formatos vienen como lista separada por comas; se usa el primero
+        columns['format'] = columns['format'].str.split(',').str[0].str.strip()
+
+        for i in range(len(chunk)):
+            record = {key: values.iat[i] for key, values in columns.items()}
+            record['id'] = self._dataset_id(record['url'], chunk.index[i])
+            record['modified'] = modified.iat[i]
+            record['tags'] = [t.strip() for t in record['tags'].split(',') if t.strip()]
+            yield record
+
+    @staticmethod
+    def _text_column(chunk: pd.DataFrame, column: str) -> pd.Series:
+        if column not in chunk.columns:
+            return pd.Series([''] * len(chunk), index=chunk.index)
+        return chunk[column].fillna('').astype(str)
+
+    @staticmethod
+    def _date_column(chunk: pd.DataFrame, column: str) -> pd.Series:
+        if column not in chunk.columns:
+            return pd.Series(pd.NaT, index=chunk.index)
+        return parse_catalog_dates(chunk[column])
+
+    @staticmethod
+    def _dataset_id(url: str, row_number: int) -> str:
+        """Derive a stable dataset id from its portal URL"""
+        if 'vgnextoid=' in url:
+            return url.split('vgnextoid=')[1].split('&')[0]
+        if url:
+            return url.rstrip('/').rsplit('/', 1)[-1]
+        return f'row-{row_number}'
+
+
+class APICatalogSource(CatalogSource):
+    """Page through a catalog API (e.g. ``CATALOG_URL``) with limit/offset"""
+
+    ITEM_KEYS = ('datasets', 'results', 'items', '@graph')
+    FIELD_ALIASES = {
+        'id': ('id', 'dataset_id', 'identifier'),
+        'title': ('title',),
+        'description': ('description',),
+        'format': ('format',),
+        'license': ('license',),
+        'frequency': ('frequency', 'accrualPeriodicity'),
+        'category': ('category', 'theme'),
+        'tags': ('tags', 'keyword'),
+        'modified': ('modified',),
+        'url': ('url', 'landingPage')
+    }
+
+    def __init__(self,
+                 catalog_url: str,
+                 page_size: int = 100,
+                 session: Optional[requests.Session] = None,
+                 timeout: float = 30.0,
+                 max_pages: Optional[int] = None):
+        self.catalog_url = catalog_url
+        self.page_size = page_size
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.max_pages = max_pages
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Yield records page by page until the API runs out of results"""
+        offset = 0
+        pages = 0
+        while self.max_pages is None or pages < self.max_pages:
+            response = self.session.get(
+                self.catalog_url,
+                params={'limit': self.page_size, 'offset': offset},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            items = self._extract_items(response.json())
+            if not items:
+                break
+
+            for item in items:
+                yield self._normalize(item)
+
+            pages += 1
+            offset += len(items)
+            if len(items) < self.page_size:
+                break
+
+    def _extract_items(self, payload) -> List[Dict]:
+        """Find the list of dataset entries in a page payload"""
+        if isinstance(payload, list):
+            return payload
+        for key in self.ITEM_KEYS:
+            if isinstance(payload.get(key), list):
+                return payload[key]
+        return []
+
+    def _normalize(self, item: Dict) -> Dict:
+        """Map an API entry onto the keys expected by parse_dataset"""
+        item = item.get('dataset', item)
+        fields = dict(item.get('metas', {}).get('default', {}))
+        fields.update({k: v for k, v in item.items() if k != 'metas'})
+
+        record = {}
+        for key, aliases in self.FIELD_ALIASES.items():
+            value = next((fields[a] for a in aliases if fields.get(a)), '')
+            if isinstance(value, list) and key != 'tags':
+                value = value[0] if value else ''
+            if isinstance(value, dict):
+                value = value.get('title') or value.get('@id') or ''
+            record[key] = value
+        if isinstance(record['tags'], str):
+            record['tags'] = [t.strip() for t in record['tags'].split(',') if t.strip()]
+        return record
+
+
+class JSONDirectorySource(CatalogSource):
+    """Read dataset JSON documents from a local directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Yield each JSON file (or each entry of a JSON list) as a record"""
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith('.json'):
+                continue
+            with open(os.path.join(self.directory, filename), encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                yield from (entry for entry in data if isinstance(entry, dict))
+            elif isinstance(data, dict):
+                yield data
@@ -0,0 +1,187 @@
+import numpy as np
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+@dataclass
+class DatasetMetadata:
+    __slots__ = ('id', 'title', 'description', 'format', 'license', 'frequency',
+                 'category', 'tags', 'last_updated', 'url')
+
+    id: str
+    title: str
+    description: str
+    format: str
+    license: str
+    frequency: str
+    category: str
+    tags: List[str]
+    last_updated: Optional[datetime]
+    url: str
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# Marca de fecha de actualización desconocida
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+
+class _Vocabulary:
+    """Interns repeated strings as integer codes"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class DatasetStore:
+    """Compact struct-of-arrays store of the parsed catalog.
+
+    Free text (ids, titles, descriptions, urls) is kept in plain lists. Category,
+    format, license and frequency are interned as int32 codes. Tags are a flat
+    array of tag ids with per-dataset offsets, and ``last_updated`` is an int64
+    of microseconds since the epoch (``MISSING_TIMESTAMP`` when unknown).
+    ``DatasetMetadata`` objects are only built on demand.
+    """
+
+    CODED_FIELDS = ('format', 'license', 'frequency', 'category')
+
+    def __init__(self, datasets: Iterable[DatasetMetadata] = ()):
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.descriptions: List[str] = []
+        self.urls: List[str] = []
+        self.vocabularies = {field: _Vocabulary() for field in self.CODED_FIELDS}
+        self.tag_vocabulary = _Vocabulary()
+        self._codes = {field: array('i') for field in self.CODED_FIELDS}
+        self._tag_ids = array('i')
+        self._tag_offsets = array('q', [0])
+        self._timestamps = array('q')
+        self._index: Dict[str, int] = {}
+        for dataset in datasets:
+            self.append(dataset)
+
+    def append(self, dataset: DatasetMetadata):
+        """Add a parsed dataset to the store"""
+        self._index.setdefault(dataset.id, len(self.ids))
+        self.ids.append(dataset.id)
+        self.titles.append(dataset.title)
+        self.descriptions.append(dataset.description)
+        self.urls.append(dataset.url)
+        for field in self.CODED_FIELDS:
+            self._codes[field].append(self.vocabularies[field].code(getattr(dataset, field)))
+        self._tag_ids.extend(self.tag_vocabulary.code(tag) for tag in dataset.tags)
+        self._tag_offsets.append(len(self._tag_ids))
+        self._timestamps.append(self.to_timestamp(dataset.last_updated))
+
+    def take(self, indices: Sequence[int]) -> 'DatasetStore':
+        """Build a new store with the given rows"""
+        return DatasetStore(self[i] for i in indices)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: int) -> DatasetMetadata:
+        return DatasetMetadata(
+            id=self.ids[i],
+            title=self.titles[i],
+            description=self.descriptions[i],
+            format=self.value('format', i),
+            license=self.value('license', i),
+            frequency=self.value('frequency', i),
+            category=self.value('category', i),
+            tags=self.tags(i),
+            last_updated=self.from_timestamp(self._timestamps[i]),
+            url=self.urls[i]
+        )
+
+    def __iter__(self) -> Iterator[DatasetMetadata]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def index_of(self, dataset_id: str) -> Optional[int]:
+        """Row of a dataset id (first occurrence), or None"""
+        return self._index.get(dataset_id)
+
+    def find(self, dataset_id: str) -> Optional[DatasetMetadata]:
+        i = self.index_of(dataset_id)
+        return None if i is None else self[i]
+
+    def record(self, i: int) -> Dict:
+        """Row ``i`` as a plain dict with the DatasetMetadata field names"""
+        return self[i].to_dict()
+
+    def records(self) -> 'RecordView':
+        """Read-only sequence of row dicts, built lazily on access"""
+        return RecordView(self)
+
+    def texts(self) -> List[str]:
+        """Concatenated title, description, tags and category of every row"""
+        categories = self.column('category')
+        return [
+            f"{self.titles[i]} {self.descriptions[i]} " + ' '.join(self.tags(i)) + f" {categories[i]}"
+            for i in range(len(self))
+        ]
+
+    def codes(self, field: str) -> np.ndarray:
+        """Integer codes of a categorical field"""
+        return np.array(self._codes[field], dtype=np.int32)
+
+    def column(self, field: str) -> np.ndarray:
+        """Decoded values of a categorical field"""
+        values = np.array(self.vocabularies[field].values, dtype=object)
+        return values[self.codes(field)] if len(values) else np.array([], dtype=object)
+
+    def value(self, field: str, i: int) -> str:
+        return self.vocabularies[field].values[self._codes[field][i]]
+
+    def tags(self, i: int) -> List[str]:
+        values = self.tag_vocabulary.values
+        return [values[t] for t in self._tag_ids[self._tag_offsets[i]:self._tag_offsets[i + 1]]]
+
+    def tag_counts(self) -> np.ndarray:
+        return np.diff(np.array(self._tag_offsets, dtype=np.int64))
+
+    def timestamps(self) -> np.ndarray:
+        """``last_updated`` as int64 microseconds since the epoch"""
+        return np.array(self._timestamps, dtype=np.int64)
+
+    @staticmethod
+    def to_timestamp(value: Optional[datetime]) -> int:
+        if value is None:
+            return MISSING_TIMESTAMP
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return (value - _EPOCH) // _MICROSECOND
+
+    @staticmethod
+    def from_timestamp(value: int) -> Optional[datetime]:
+        return None if value == MISSING_TIMESTAMP else _EPOCH + value * _MICROSECOND
+
+
+class RecordView:
+    """Sequence of row dicts over a DatasetStore"""
+
+    def __init__(self, store: DatasetStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, i: int) -> Dict:
+        return self.store.record(i)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self.store)):
+            yield self.store.record(i)
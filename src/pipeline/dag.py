@@ -0,0 +1,71 @@
+import time
+from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]  # Receives the results of depends_on as keyword arguments
+    depends_on: Sequence[str] = ()
+
+class Pipeline:
+    """DAG of stages run on a thread pool.
+
+    A stage starts as soon as all the stages it depends on have finished, so
+    independent stages run concurrently. ``run`` returns every stage's result
+    together with its wall time in seconds.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.stages: Dict[str, Stage] = {}
+        self.max_workers = max_workers
+
+    def add(self, name: str, func: Callable[..., Any], depends_on: Sequence[str] = ()) -> 'Pipeline':
+        """Add a stage; dependencies must already be defined"""
+        if name in self.stages:
+            raise ValueError(f"Stage {name} is already defined")
+        for dependency in depends_on:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dependency}")
+        self.stages[name] = Stage(name, func, tuple(depends_on))
+        return self
+
+    def run(self, done: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Run all stages and return (results, timings)
+
+        Stages whose results are already given in ``done`` are not run again.
+        """
+        results: Dict[str, Any] = dict(done or {})
+        timings: Dict[str, float] = {}
+        pending = {name: stage for name, stage in self.stages.items() if name not in results}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(self.stages) or 1) as executor:
+            running = {}
+            while pending or running:
+                # Lanzar las etapas cuyas dependencias ya han terminado
+                for name, stage in list(pending.items()):
+                    if all(dependency in results for dependency in stage.depends_on):
+                        del pending[name]
+                        running[executor.submit(self._run_stage, stage, results)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name], timings[name] = future.result()
+                    except Exception:
+                        # No lanzar más etapas; esperar a las que ya están en marcha
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        timings['total'] = time.perf_counter() - start
+        return results, timings
+
+    @staticmethod
+    def _run_stage(stage: Stage, results: Dict[str, Any]) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        result = stage.func(**{dependency: results[dependency] for dependency in stage.depends_on})
+        return result, time.perf_counter() - start
@@ -1,4 +1,5 @@
-from typing import Dict, List
+from typing import Dict, Iterator, List, Sequence, Union
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 
@@ -15,6 +16,74 @@ class QualityScore:
     tags_score: float
     issues: List[str]
 
+class QualityScores:
+    """Columnar collection of quality scores.
+
+    Component scores live in a DataFrame and issues in a (datasets x issue codes)
+    boolean matrix, where column ``j`` stands for ``issue_labels[j]``.
+    ``QualityScore`` rows are only built on demand.
+    """
+
+    def __init__(self, frame: pd.DataFrame, issue_masks: np.ndarray, issue_labels: Sequence[str]):
+        self.frame = frame.reset_index(drop=True)
+        self.issue_masks = np.asarray(issue_masks, dtype=bool).reshape(len(frame), len(issue_labels))
+        self.issue_labels = list(issue_labels)
+
+    @classmethod
+    def from_scores(cls, scores: Sequence[QualityScore], issue_labels: Sequence[str]) -> 'QualityScores':
+        """Build the columnar form from QualityScore objects"""
+        labels = list(issue_labels)
+        for score in scores:
+            labels.extend(issue for issue in score.issues if issue not in labels)
+        codes = {label: j for j, label in enumerate(labels)}
+
+        frame = pd.DataFrame([{k: v for k, v in vars(score).items() if k != 'issues'} for score in scores],
+                             columns=QualityScorer.SCORE_COLUMNS)
+        masks = np.zeros((len(scores), len(labels)), dtype=bool)
+        for i, score in enumerate(scores):
+            masks[i, [codes[issue] for issue in score.issues]] = True
+        return cls(frame, masks, labels)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __getitem__(self, i: int) -> QualityScore:
+        row = self.frame.iloc[i]
+        return QualityScore(
+            *[row[name].item() if hasattr(row[name], 'item') else row[name]
+              for name in QualityScorer.SCORE_COLUMNS],
+            issues=[self.issue_labels[j] for j in np.flatnonzero(self.issue_masks[i])]
+        )
+
+    def __iter__(self) -> Iterator[QualityScore]:
+        labels = np.array(self.issue_labels, dtype=object)
+        columns = [self.frame[name].tolist() for name in QualityScorer.SCORE_COLUMNS]
+        for *values, mask in zip(*columns, self.issue_masks):
+            yield QualityScore(*values, issues=labels[mask].tolist())
+
+    def to_records(self) -> List[Dict]:
+        """Return the scores as a list of dicts (one per dataset)"""
+        return [vars(score) for score in self]
+
+    def summary(self) -> Dict:
+        """Score distribution and issue counts in a single pass over the columns"""
+        overall = self.frame['overall_score'].to_numpy(dtype=float)
+        # 0: pobre (<0.4), 1: regular, 2: bueno, 3: excelente (>=0.8)
+        buckets = np.bincount(np.digitize(overall, [0.4, 0.6, 0.8]), minlength=4)
+        counts = self.issue_masks.sum(axis=0)
+        order = np.argsort(-counts, kind='stable')
+        return {
+            'total_datasets': len(overall),
+            'average_score': float(overall.mean()) if len(overall) else 0.0,
+            'score_distribution': {
+                'excellent': int(buckets[3]),
+                'good': int(buckets[2]),
+                'fair': int(buckets[1]),
+                'poor': int(buckets[0])
+            },
+            'common_issues': {self.issue_labels[j]: int(counts[j]) for j in order if counts[j] > 0}
+        }
+
 class QualityScorer:
     def __init__(self):
         self.weights = {
@@ -27,119 +96,125 @@ class QualityScorer:
             'tags': 0.05
         }
     
-    def calculate_scores(self, analysis_df: pd.DataFrame) -> List[QualityScore]:
+    SCORE_COLUMNS = ['dataset_id', 'overall_score', 'metadata_score', 'format_score',
+                     'license_score', 'frequency_score', 'description_score',
+                     'category_score', 'tags_score']
+
+    # Reglas de incidencias: (mensaje, columna, comparación, umbral)
+    ISSUE_RULES = [
+        ("Título demasiado corto", 'title_length', np.less, 10),
+        ("Descripción insuficiente", 'description_length', np.less, 50),
+        ("Falta categoría", 'has_category', np.equal, False),
+        ("Pocas etiquetas", 'num_tags', np.less, 3),
+        ("Formato no óptimo", 'format_score', np.less, 0.7),
+        ("Licencia restrictiva", 'license_score', np.less, 0.8),
+        ("Baja frecuencia de actualización", 'frequency_score', np.less, 0.6),
+        ("Dataset desactualizado", 'days_since_update', np.greater, 365)
+    ]
+
+    # Columnas del análisis que dependen de la fecha actual
+    TIME_BASED_COLUMNS = ('days_since_update',)
+
+    @property
+    def issue_labels(self) -> List[str]:
+        return [rule[0] for rule in self.ISSUE_RULES]
+
+    def calculate_scores(self, analysis_df: pd.DataFrame) -> QualityScores:
         """Calculate quality scores for all datasets"""
-        scores = []
-        
-        for _, row in analysis_df.iterrows():
-            # Calculate individual component scores
-            metadata_score = self._calculate_metadata_score(row)
-            format_score = row['format_score']
-            license_score = row['license_score']
-            frequency_score = row['frequency_score']
-            description_score = self._calculate_description_score(row)
-            category_score = 1.0 if row['has_category'] else 0.0
-            tags_score = min(row['num_tags'] / 5, 1.0)  # Normalize to 1.0
-            
-            # Calculate weighted overall score
-            overall_score = (
-                metadata_score * self.weights['metadata'] +
-                format_score * self.weights['format'] +
-                license_score * self.weights['license'] +
-                frequency_score * self.weights['frequency'] +
-                description_score * self.weights['description'] +
-                category_score * self.weights['category'] +
-                tags_score * self.weights['tags']
-            )
-            
-            # Collect issues
-            issues = self._collect_issues(row)
-            
-            scores.append(QualityScore(
-                dataset_id=row['id'],
-                overall_score=overall_score,
-                metadata_score=metadata_score,
-                format_score=format_score,
-                license_score=license_score,
-                frequency_score=frequency_score,
-                description_score=description_score,
-                category_score=category_score,
-                tags_score=tags_score,
-                issues=issues
-            ))
-        
-        return scores
+        if analysis_df.empty:
+            return QualityScores(pd.DataFrame(columns=self.SCORE_COLUMNS),
+                                 np.zeros((0, len(self.ISSUE_RULES)), dtype=bool),
+                                 self.issue_labels)
+
+        return QualityScores(self.calculate_score_frame(analysis_df),
+                             self._issue_masks(analysis_df),
+                             self.issue_labels)
+
+    def calculate_score_frame(self, analysis_df: pd.DataFrame) -> pd.DataFrame:
+        """Calculate every component score column-wise and return them as a frame"""
+        format_score = analysis_df['format_score'].to_numpy(dtype=float)
+        license_score = analysis_df['license_score'].to_numpy(dtype=float)
+        frequency_score = analysis_df['frequency_score'].to_numpy(dtype=float)
+        has_category = analysis_df['has_category'].to_numpy(dtype=bool)
+        num_tags = analysis_df['num_tags'].to_numpy(dtype=float)
+
+        metadata_score = self._metadata_scores(analysis_df)
+        description_score = self._description_scores(analysis_df)
+        category_score = np.where(has_category, 1.0, 0.0)
+        tags_score = np.minimum(num_tags / 5, 1.0)  # Normalize to 1.0
+
+        # Calculate weighted overall score
+        overall_score = (
+            metadata_score * self.weights['metadata'] +
+            format_score * self.weights['format'] +
+            license_score * self.weights['license'] +
+            frequency_score * self.weights['frequency'] +
+            description_score * self.weights['description'] +
+            category_score * self.weights['category'] +
+            tags_score * self.weights['tags']
+        )
+
+        return pd.DataFrame({
+            'dataset_id': analysis_df['id'].to_numpy(),
+            'overall_score': overall_score,
+            'metadata_score': metadata_score,
+            'format_score': format_score,
+            'license_score': license_score,
+            'frequency_score': frequency_score,
+            'description_score': description_score,
+            'category_score': category_score,
+            'tags_score': tags_score
+        })
     
-    def _calculate_metadata_score(self, row: pd.Series) -> float:
-        """Calculate score for metadata completeness"""
-        score = 0.0
-        if row['title_length'] > 0:
-            score += 0.2
-        if row['description_length'] > 0:
-            score += 0.2
-        if row['has_category']:
-            score += 0.2
-        if row['num_tags'] > 0:
-            score += 0.2
-        if row['format_score'] > 0:
-            score += 0.2
+    def _metadata_scores(self, analysis_df: pd.DataFrame) -> np.ndarray:
+        """Calculate scores for metadata completeness"""
+        checks = [
+            analysis_df['title_length'].to_numpy() > 0,
+            analysis_df['description_length'].to_numpy() > 0,
+            analysis_df['has_category'].to_numpy(dtype=bool),
+            analysis_df['num_tags'].to_numpy() > 0,
+            analysis_df['format_score'].to_numpy() > 0
+        ]
+        score = np.zeros(len(analysis_df))
+        for check in checks:
+            score = score + np.where(check, 0.2, 0.0)
         return score
     
-    def _calculate_description_score(self, row: pd.Series) -> float:
-        """Calculate score for description quality"""
-        if not row['has_description']:
-            return 0.0
-        length = row['description_length']
-        if length < 50:
-            return 0.3
-        elif length < 100:
-            return 0.6
-        elif length < 200:
-            return 0.8
-        else:
-            return 1.0
+    def _description_scores(self, analysis_df: pd.DataFrame) -> np.ndarray:
+        """Calculate scores for description quality"""
+        has_description = analysis_df['has_description'].to_numpy(dtype=bool)
+        length = analysis_df['description_length'].to_numpy()
+        return np.select(
+            [~has_description, length < 50, length < 100, length < 200],
+            [0.0, 0.3, 0.6, 0.8],
+            default=1.0
+        )
     
-    def _collect_issues(self, row: pd.Series) -> List[str]:
-        """Collect quality issues for the dataset"""
-        issues = []
-        
-        if row['title_length'] < 10:
-            issues.append("Título demasiado corto")
-        if row['description_length'] < 50:
-            issues.append("Descripción insuficiente")
-        if not row['has_category']:
-            issues.append("Falta categoría")
-        if row['num_tags'] < 3:
-            issues.append("Pocas etiquetas")
-        if row['format_score'] < 0.7:
-            issues.append("Formato no óptimo")
-        if row['license_score'] < 0.8:
-            issues.append("Licencia restrictiva")
-        if row['frequency_score'] < 0.6:
-            issues.append("Baja frecuencia de actualización")
-        if row['days_since_update'] > 365:
-            issues.append("Dataset desactualizado")
-            
-        return issues
+    def _issue_masks(self, analysis_df: pd.DataFrame) -> np.ndarray:
+        """Evaluate every issue rule, returning a (datasets x rules) boolean matrix"""
+        return np.column_stack([
+            compare(analysis_df[column].to_numpy(), threshold)
+            for _, column, compare, threshold in self.ISSUE_RULES
+        ])
     
-    def get_quality_summary(self, scores: List[QualityScore]) -> Dict:
+    def refresh_time_based_issues(self, scores: QualityScores, analysis_df: pd.DataFrame):
+        """Re-evaluate, in place, the issue rules that depend on the current date
+
+        Scores kept from a previous run would otherwise keep the time-based
+        issues of the day they were computed. ``analysis_df`` needs the ``id``
+        column and the ``TIME_BASED_COLUMNS``; no component score depends on
+        the date.
+        """
+        analysis = analysis_df.drop_duplicates('id').set_index('id').reindex(scores.frame['dataset_id'])
+        for label, column, compare, threshold in self.ISSUE_RULES:
+            if column in self.TIME_BASED_COLUMNS and label in scores.issue_labels:
+                values = analysis[column].to_numpy()
+                known = ~pd.isna(values)
+                mask = scores.issue_masks[:, scores.issue_labels.index(label)]
+                mask[known] = compare(values[known].astype(float), threshold)
+
+    def get_quality_summary(self, scores: Union[QualityScores, List[QualityScore]]) -> Dict:
         """Generate a summary of quality scores"""
-        return {
-            'total_datasets': len(scores),
-            'average_score': sum(s.overall_score for s in scores) / len(scores),
-            'score_distribution': {
-                'excellent': len([s for s in scores if s.overall_score >= 0.8]),
-                'good': len([s for s in scores if 0.6 <= s.overall_score < 0.8]),
-                'fair': len([s for s in scores if 0.4 <= s.overall_score < 0.6]),
-                'poor': len([s for s in scores if s.overall_score < 0.4])
-            },
-            'common_issues': self._get_common_issues(scores)
-        }
-    
-    def _get_common_issues(self, scores: List[QualityScore]) -> Dict[str, int]:
-        """Count frequency of common issues"""
-        issue_counts = {}
-        for score in scores:
-            for issue in score.issues:
-                issue_counts[issue] = issue_counts.get(issue, 0) + 1
-        return dict(sorted(issue_counts.items(), key=lambda x: x[1], reverse=True)) 
\ No newline at end of file
+        if not isinstance(scores, QualityScores):
+            scores = QualityScores.from_scores(scores, self.issue_labels)
+        return scores.summary()
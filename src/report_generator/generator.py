@@ -1,7 +1,9 @@
 import os
+import multiprocessing
 from datetime import datetime
-from typing import Dict, List
-from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from dataclasses import dataclass
 
 @dataclass
@@ -13,28 +15,186 @@ class ReportData:
     enhancement_summary: Dict
     generation_date: datetime
 
+def _worker_context():
+    # El informe se genera desde un hilo del pipeline: hacer fork con otros hilos
+    # en marcha puede dejar bloqueos tomados en el proceso hijo
+    return multiprocessing.get_context('spawn')
+
+def _create_environment(template_dir: str,
+                        bytecode_cache_dir: Optional[str],
+                        auto_reload: bool) -> Environment:
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        bytecode_cache=bytecode_cache,
+        auto_reload=auto_reload
+    )
+
+# Un entorno por proceso de trabajo, reutilizado entre páginas
+_worker_environments: Dict[tuple, Environment] = {}
+
+def _render_page(settings: tuple, template_name: str, context: Dict, output_path: str) -> str:
+    """Render a single report page (runs in a worker process)"""
+    env = _worker_environments.get(settings)
+    if env is None:
+        env = _worker_environments[settings] = _create_environment(*settings)
+    env.get_template(template_name).stream(**context).dump(output_path, encoding='utf-8')
+    return output_path
+
+def _write_pdf(html_paths: List[str], output_path: str, stylesheet_path: str) -> str:
+    """Convert rendered HTML pages into a single PDF (runs in a worker process)"""
+    # WeasyPrint tarda en importarse, así que solo se carga en el proceso de PDF
+    from weasyprint import CSS, HTML
+    from weasyprint.text.fonts import FontConfiguration
+
+    # Fuentes, hoja de estilo e imágenes compartidas por todas las páginas del informe
+    font_config = FontConfiguration()
+    stylesheet = CSS(filename=stylesheet_path, font_config=font_config)
+    cache = {}
+
+    documents = [
+        HTML(filename=path).render(stylesheets=[stylesheet], font_config=font_config, cache=cache)
+        for path in html_paths
+    ]
+    pages = [page for document in documents for page in document.pages]
+    documents[0].copy(pages).write_pdf(output_path)
+    return output_path
+
 class ReportGenerator:
-    def __init__(self, template_dir: str = None):
+    def __init__(self,
+                 template_dir: str = None,
+                 bytecode_cache_dir: Optional[str] = None,
+                 auto_reload: bool = True):
+        """
+        Initialize the report generator
+
+        Args:
+            template_dir: Directory with the Jinja templates (defaults to the bundled ones)
+            bytecode_cache_dir: Directory where compiled templates are cached between runs (optional)
+            auto_reload: Check template files for changes on every render (disable in production)
+        """
         self.template_dir = template_dir or os.path.join(os.path.dirname(__file__), 'templates')
-        self.env = Environment(loader=FileSystemLoader(self.template_dir))
+        self.bytecode_cache_dir = bytecode_cache_dir
+        self.auto_reload = auto_reload
+        self.env = _create_environment(self.template_dir, bytecode_cache_dir, auto_reload)
+        self._pdf_executor = None
+        self.pending_pdfs: Dict[str, Future] = {}
         
     def generate_html_report(self, data: ReportData, output_path: str) -> str:
-        """Generate an HTML report"""
+        """Generate an HTML report, streaming it to ``output_path``"""
         template = self.env.get_template('report_template.html')
-        html_content = template.render(
+        # Escribir la página a medida que se renderiza, sin construirla entera en memoria
+        template.stream(
             quality_scores=data.quality_scores,
             enhanced_metadata=data.enhanced_metadata,
             problematic_datasets=data.problematic_datasets,
             quality_summary=data.quality_summary,
             enhancement_summary=data.enhancement_summary,
             generation_date=data.generation_date.strftime('%Y-%m-%d %H:%M:%S')
-        )
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        ).dump(output_path, encoding='utf-8')
             
         return output_path
     
+    def generate_sharded_report(self,
+                                data: ReportData,
+                                index_path: str,
+                                shard_size: int = 500,
+                                max_workers: Optional[int] = None) -> List[str]:
+        """Generate an index page plus detail pages of at most ``shard_size`` rows
+
+        The index holds the summary and links to the detail pages of the
+        problematic datasets and the suggested improvements. Detail pages are
+        rendered in parallel worker processes. Returns every page path, the
+        index first.
+        """
+        output_dir = os.path.dirname(index_path)
+        base_filename = os.path.splitext(os.path.basename(index_path))[0]
+        generation_date = data.generation_date.strftime('%Y-%m-%d %H:%M:%S')
+
+        sections = {
+            'problematic': ('problematic_datasets', '_problematic_datasets.html', data.problematic_datasets),
+            'enhanced': ('enhanced_metadata', '_enhanced_metadata.html', data.enhanced_metadata)
+        }
+        pages = {name: [] for name in sections}
+        jobs = []
+        for name, (variable, section_template, rows) in sections.items():
+            starts = range(0, len(rows), shard_size)
+            filenames = [f'{base_filename}_{name}_{n + 1:03d}.html' for n in range(len(starts))]
+            for n, start in enumerate(starts):
+                end = min(start + shard_size, len(rows))
+                pages[name].append({'filename': filenames[n], 'start': start, 'end': end})
+                jobs.append(({
+                    variable: rows[start:end],
+                    'section_template': section_template,
+                    'generation_date': generation_date,
+                    'index_page': os.path.basename(index_path),
+                    'previous_page': filenames[n - 1] if n > 0 else None,
+                    'next_page': filenames[n + 1] if n + 1 < len(filenames) else None,
+                    'page_number': n + 1,
+                    'page_count': len(filenames)
+                }, os.path.join(output_dir, filenames[n])))
+
+        settings = (self.template_dir, self.bytecode_cache_dir, self.auto_reload)
+        paths = [index_path]
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_worker_context()) as executor:
+            futures = [executor.submit(_render_page, settings, 'report_page_template.html', context, path)
+                       for context, path in jobs]
+            # El índice se renderiza en este proceso mientras tanto
+            self.env.get_template('report_index_template.html').stream(
+                quality_summary=data.quality_summary,
+                enhancement_summary=data.enhancement_summary,
+                generation_date=generation_date,
+                problematic_total=len(data.problematic_datasets),
+                problematic_pages=pages['problematic'],
+                enhanced_total=len(data.enhanced_metadata),
+                enhanced_pages=pages['enhanced']
+            ).dump(index_path, encoding='utf-8')
+            paths.extend(future.result() for future in futures)
+        return paths
+
+    def generate_pdf_report(self, html_paths: List[str], output_path: str) -> Future:
+        """Start converting already rendered HTML pages into one PDF
+
+        The conversion runs in a separate process, so it overlaps with other
+        work; the print stylesheet ``report_print.css`` replaces the layouts
+        WeasyPrint handles poorly.
+        """
+        if self._pdf_executor is None:
+            self._pdf_executor = ProcessPoolExecutor(max_workers=1, mp_context=_worker_context())
+        stylesheet_path = os.path.join(self.template_dir, 'report_print.css')
+        return self._pdf_executor.submit(_write_pdf, html_paths, output_path, stylesheet_path)
+
+    def wait_for_pdf_reports(self) -> List[str]:
+        """Wait for the pending PDF conversions and return the ones that succeeded
+
+        The PDF worker process is shut down afterwards (it is started again by
+        the next ``generate_pdf_report``).
+        """
+        done = []
+        for path, future in self.pending_pdfs.items():
+            try:
+                done.append(future.result())
+            except Exception as e:
+                print(f"Error generating PDF report {path}: {str(e)}")
+        self.pending_pdfs = {}
+        self.close()
+        return done
+
+    def close(self):
+        """Shut down the PDF worker process, waiting for running conversions"""
+        if self._pdf_executor is not None:
+            self._pdf_executor.shutdown(wait=True)
+            self._pdf_executor = None
+
+    def __enter__(self) -> 'ReportGenerator':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def generate_monthly_report(self, 
                               quality_scores: List[Dict],
                               enhanced_metadata: List[Dict],
@@ -42,8 +202,18 @@ class ReportGenerator:
                               quality_summary: Dict,
                               enhancement_summary: Dict,
                               output_dir: str,
-                              format: str = 'html') -> Dict[str, str]:
-        """Generate monthly report in HTML format"""
+                              format: str = 'html',
+                              shard_size: Optional[int] = None,
+                              max_workers: Optional[int] = None,
+                              wait: bool = True) -> Dict[str, str]:
+        """Generate monthly report in HTML and/or PDF format
+
+        With ``shard_size`` the report is split into an index page and detail
+        pages of at most ``shard_size`` rows each; ``'html'`` is the index.
+        The PDF is converted from the rendered HTML in a separate process; with
+        ``wait=False`` it keeps running in the background until
+        ``wait_for_pdf_reports`` is called.
+        """
         data = ReportData(
             quality_scores=quality_scores,
             enhanced_metadata=enhanced_metadata,
@@ -62,8 +232,23 @@ class ReportGenerator:
         
         output_paths = {}
         
-        if format in ['html', 'both']:
+        if format in ['html', 'pdf', 'both']:
+            # El PDF se genera a partir del HTML ya renderizado
             html_path = os.path.join(output_dir, f'{base_filename}.html')
-            output_paths['html'] = self.generate_html_report(data, html_path)
+            if shard_size:
+                html_paths = self.generate_sharded_report(
+                    data, html_path, shard_size=shard_size, max_workers=max_workers
+                )
+            else:
+                html_paths = [self.generate_html_report(data, html_path)]
+            if format in ['html', 'both']:
+                output_paths['html'] = html_paths[0]
+
+        if format in ['pdf', 'both']:
+            pdf_path = os.path.join(output_dir, f'{base_filename}.pdf')
+            self.pending_pdfs[pdf_path] = self.generate_pdf_report(html_paths, pdf_path)
+            output_paths['pdf'] = pdf_path
+            if wait and pdf_path not in self.wait_for_pdf_reports():
+                del output_paths['pdf']
             
-        return output_paths 
\ No newline at end of file
+        return output_paths
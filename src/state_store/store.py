@@ -0,0 +1,88 @@
+import json
+import sqlite3
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class StateStore:
+    """SQLite store of per-dataset results from previous runs.
+
+    For every dataset it keeps a content hash of its metadata together with
+    the last quality score, detected problems and enhanced metadata, so that
+    a run only needs to process datasets that are new or have changed.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS datasets (
+                id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                quality_score TEXT,
+                problems TEXT,
+                enhanced_metadata TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def content_hash(fields: Dict) -> str:
+        """Hash the metadata fields of a dataset"""
+        payload = json.dumps(fields, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def diff(self, hashes: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Split dataset ids into changed (new or modified) and removed ones"""
+        stored = dict(self.conn.execute("SELECT id, content_hash FROM datasets"))
+        changed = [dataset_id for dataset_id, content_hash in hashes.items()
+                   if stored.get(dataset_id) != content_hash]
+        removed = [dataset_id for dataset_id in stored if dataset_id not in hashes]
+        return changed, removed
+
+    def load(self, ids: Iterable[str]) -> Dict[str, Dict]:
+        """Load the stored results for the given dataset ids"""
+        results = {}
+        ids = list(ids)
+        # SQLite limita el número de parámetros por consulta
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT id, quality_score, problems, enhanced_metadata "
+                f"FROM datasets WHERE id IN ({placeholders})", batch
+            )
+            for dataset_id, quality_score, problems, enhanced in rows:
+                results[dataset_id] = {
+                    'quality_score': json.loads(quality_score) if quality_score else None,
+                    'problems': json.loads(problems) if problems else None,
+                    'enhanced_metadata': json.loads(enhanced) if enhanced else None
+                }
+        return results
+
+    def save(self,
+             dataset_id: str,
+             content_hash: str,
+             quality_score: Optional[Dict],
+             problems: Optional[Dict],
+             enhanced_metadata: Optional[Dict]):
+        """Insert or replace the results of a single dataset"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?)",
+            (dataset_id, content_hash,
+             json.dumps(quality_score, ensure_ascii=False) if quality_score else None,
+             json.dumps(problems, ensure_ascii=False) if problems else None,
+             json.dumps(enhanced_metadata, ensure_ascii=False) if enhanced_metadata else None,
+             datetime.now().isoformat())
+        )
+
+    def delete(self, ids: Iterable[str]):
+        """Remove datasets that are no longer in the catalog"""
+        self.conn.executemany("DELETE FROM datasets WHERE id = ?", [(i,) for i in ids])
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
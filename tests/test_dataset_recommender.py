@@ -0,0 +1,217 @@
+import random
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+from src.dataset_recommender.recommender import DatasetRecommender
+from src.dataset_recommender.index import ExactIndex, IVFIndex, LSHIndex
+from src.dataset_recommender.benchmark import benchmark_index
+
+CATEGORIES = ['Transporte', 'Medio ambiente', 'Cultura', 'Salud', 'Economía']
+
+
+def make_datasets(n: int, seed: int = 0, prefix: str = 'd'):
+    """Synthetic catalog: each dataset mostly uses the words of one of 20 topics"""
+    rng = random.Random(seed)
+    topics = [[f't{t}w{i}' for i in range(80)] for t in range(20)]
+    common = [f'c{i}' for i in range(400)]
+    datasets = []
+    for i in range(n):
+        topic = topics[rng.randrange(len(topics))]
+        words = rng.choices(topic, k=20) + rng.choices(common, k=10)
+        datasets.append({
+            'id': f'{prefix}{i}',
+            'title': ' '.join(rng.choices(topic, k=4)),
+            'description': ' '.join(words),
+            'tags': rng.sample(common[:30], 3),
+            'category': rng.choice(CATEGORIES)
+        })
+    return datasets
+
+
+def brute_force(recommender: DatasetRecommender, row: int, n: int):
+    """Reference: the ``n`` most similar rows by full cosine similarity, excluding ``row``"""
+    scores = cosine_similarity(recommender.tfidf_matrix[row], recommender.tfidf_matrix).ravel()
+    scores[row] = -np.inf
+    order = np.argsort(-scores, kind='stable')[:n]
+    return order, scores[order]
+
+
+def assert_same(recommendations, indices, scores, recommender, min_similarity):
+    expected = [(recommender.datasets[i]['id'], s) for i, s in zip(indices, scores) if s >= min_similarity]
+    assert [r.dataset_id for r in recommendations] == [i for i, _ in expected]
+    assert [r.similarity_score for r in recommendations] == pytest.approx([s for _, s in expected])
+
+
+@pytest.fixture(scope='module')
+def datasets():
+    return make_datasets(1500)
+
+
+@pytest.mark.parametrize('top_k', [0, 10])
+@pytest.mark.parametrize('n', [5, 25])
+def test_recommendations_match_brute_force(datasets, top_k, n):
+    recommender = DatasetRecommender(top_k=top_k, block_size=256)
+    recommender.fit(datasets)
+    for row in range(0, len(datasets), 97):
+        indices, scores = brute_force(recommender, row, n)
+        recommendations = recommender.get_recommendations(datasets[row]['id'], n, min_similarity=0.05)
+        assert_same(recommendations, indices, scores, recommender, 0.05)
+
+
+def test_unknown_dataset_raises(datasets):
+    recommender = DatasetRecommender()
+    recommender.fit(datasets[:50])
+    with pytest.raises(ValueError):
+        recommender.get_recommendations('missing')
+
+
+def test_text_recommendations_match_brute_force(datasets):
+    recommender = DatasetRecommender()
+    recommender.fit(datasets)
+    for dataset in datasets[:200:20]:
+        query = recommender.vectorizer.transform([dataset['title']])
+        scores = cosine_similarity(query, recommender.tfidf_matrix).ravel()
+        order = np.argsort(-scores, kind='stable')[:5]
+        recommendations = recommender.get_recommendations_by_text(dataset['title'], 5)
+        assert_same(recommendations, order, scores[order], recommender, 0.1)
+
+
+def test_category_recommendations_match_mean_similarity(datasets):
+    recommender = DatasetRecommender()
+    recommender.fit(datasets)
+    for category in CATEGORIES:
+        rows = [i for i, d in enumerate(datasets) if d['category'] == category]
+        mean = cosine_similarity(recommender.tfidf_matrix[rows]).mean(axis=1)
+        order = np.argsort(mean)[::-1][:10]
+        recommendations = recommender.get_recommendations_by_category(category, 10)
+        assert [r.dataset_id for r in recommendations] == [datasets[rows[i]]['id'] for i in order]
+        assert [r.similarity_score for r in recommendations] == pytest.approx(mean[order].tolist())
+    assert recommender.get_recommendations_by_category('Inexistente') == []
+
+
+@pytest.mark.parametrize('top_k', [0, 10])
+def test_batch_matches_single_queries(datasets, top_k):
+    recommender = DatasetRecommender(top_k=top_k, block_size=128)
+    recommender.fit(datasets)
+    ids = [d['id'] for d in datasets]
+    single = [recommender.get_recommendations(i, 8, 0.05) for i in ids]
+    assert recommender.get_recommendations_batch(ids=ids, n_recommendations=8, min_similarity=0.05) == single
+    assert recommender.get_recommendations_batch(ids=ids, n_recommendations=8, min_similarity=0.05,
+                                                 n_jobs=2) == single
+
+    texts = [d['title'] for d in datasets[:100]]
+    assert (recommender.get_recommendations_batch(texts=texts, n_recommendations=5)
+            == [recommender.get_recommendations_by_text(t, 5) for t in texts])
+
+
+def test_batch_arrays_mask_low_scores(datasets):
+    recommender = DatasetRecommender()
+    recommender.fit(datasets)
+    indices, scores = recommender.get_recommendations_batch(ids=[datasets[0]['id']], n_recommendations=50,
+                                                            min_similarity=0.2, return_arrays=True)
+    below = scores[0] < 0.2
+    assert below.any() and (indices[0][below] == -1).all() and np.isneginf(scores[0][below]).all()
+    with pytest.raises(ValueError):
+        recommender.get_recommendations_batch()
+
+
+def test_ivf_with_every_list_probed_is_exact(datasets):
+    recommender = DatasetRecommender()
+    recommender.fit(datasets)
+    queries = recommender.vectorizer.transform([d['title'] for d in datasets[:100]])
+    exact = ExactIndex().build(recommender.tfidf_matrix)
+    index = IVFIndex(n_lists=16, n_probe=16).build(recommender.tfidf_matrix)
+    expected, expected_scores = exact.search(queries, 10)
+    found, found_scores = index.search(queries, 10)
+    np.testing.assert_allclose(found_scores, expected_scores)
+
+
+@pytest.mark.parametrize('index', [IVFIndex(n_probe=8), LSHIndex(n_bits=8, n_tables=16)],
+                         ids=['ivf', 'lsh'])
+def test_approximate_index_recall(datasets, index):
+    recommender = DatasetRecommender()
+    recommender.fit(datasets)
+    queries = recommender.vectorizer.transform([d['title'] for d in datasets[::15]])
+    result = benchmark_index(index, recommender.tfidf_matrix, queries, k=10)
+    assert result['recall_at_k'] >= 0.7
+
+
+def test_text_recommendations_with_approximate_index(datasets):
+    recommender = DatasetRecommender(text_index=IVFIndex(n_probe=8))
+    recommender.fit(datasets)
+    recommendations = recommender.get_recommendations_by_text(datasets[3]['title'], 5)
+    assert recommendations and recommendations[0].similarity_score >= recommendations[-1].similarity_score
+
+
+def test_partial_fit_matches_recompute():
+    datasets = make_datasets(1200, seed=1)
+    recommender = DatasetRecommender(top_k=10, block_size=128)
+    recommender.fit(datasets)
+    vocabulary = dict(recommender.vectorizer.vocabulary_)
+
+    added = make_datasets(30, seed=2, prefix='n')
+    updated = [dict(d, title='t0w1 t0w2 ' + d['title']) for d in datasets[100:120]]
+    removed = [d['id'] for d in datasets[500:530]]
+    recommender.partial_fit(added + updated, removed_ids=removed)
+    recommender.partial_fit(make_datasets(10, seed=3, prefix='m'), removed_ids=['n0', 'd7'])
+
+    expected_ids = ([d['id'] for d in datasets if d['id'] not in removed and d['id'] != 'd7']
+                    + [d['id'] for d in added[1:]] + [f'm{i}' for i in range(10)])
+    assert recommender.ids == expected_ids
+    assert [d['id'] for d in recommender.datasets] == expected_ids
+    assert recommender.datasets[recommender.ids.index('d100')]['title'].startswith('t0w1 t0w2')
+    # Vocabulario e IDF fijos hasta el siguiente reajuste completo
+    assert recommender.vectorizer.vocabulary_ == vocabulary
+    transformed = recommender.vectorizer.transform(recommender._texts)
+    assert abs(transformed - recommender.tfidf_matrix).max() < 1e-12
+
+    for row in range(0, len(expected_ids), 7):
+        _, scores = brute_force(recommender, row, 10)
+        np.testing.assert_allclose(recommender.neighbor_scores[row], scores)
+    assert recommender.get_recommendations_batch(ids=['m3'], n_recommendations=5)[0] == \
+        recommender.get_recommendations('m3', 5)
+    members = [i for i, d in enumerate(recommender.datasets) if d['category'] == CATEGORIES[0]]
+    assert len(recommender._categories[CATEGORIES[0]]) == len(members)
+
+
+def test_partial_fit_refits_after_many_changes():
+    datasets = make_datasets(200, seed=4)
+    recommender = DatasetRecommender(top_k=5, refit_fraction=0.2)
+    recommender.fit(datasets)
+    recommender.partial_fit(make_datasets(20, seed=5, prefix='n'))
+    assert recommender._changed_since_fit == 20
+    recommender.partial_fit(make_datasets(40, seed=6, prefix='m'))
+    assert recommender._changed_since_fit == 0
+    refitted = DatasetRecommender(top_k=5)
+    refitted.fit(datasets + make_datasets(20, seed=5, prefix='n') + make_datasets(40, seed=6, prefix='m'))
+    assert recommender.get_recommendations('m1', 5) == refitted.get_recommendations('m1', 5)
+
+
+def test_save_and_load(tmp_path, datasets):
+    recommender = DatasetRecommender(top_k=10)
+    recommender.fit(datasets)
+    path = str(tmp_path / 'recommender.npz')
+    recommender.save(path)
+
+    loaded = DatasetRecommender.load(path)
+    assert loaded.ids == recommender.ids
+    for dataset in datasets[:100:10]:
+        assert loaded.get_recommendations(dataset['id']) == recommender.get_recommendations(dataset['id'])
+        assert (loaded.get_recommendations_by_text(dataset['title'])
+                == recommender.get_recommendations_by_text(dataset['title']))
+    assert loaded.get_recommendations_by_category('Cultura') == \
+        recommender.get_recommendations_by_category('Cultura')
+
+    loaded.partial_fit(make_datasets(5, seed=7, prefix='n'), removed_ids=['d1'])
+    assert loaded.ids[-5:] == [f'n{i}' for i in range(5)] and 'd1' not in loaded.ids
+
+
+def test_load_rejects_other_versions(tmp_path, datasets, monkeypatch):
+    recommender = DatasetRecommender()
+    recommender.fit(datasets[:50])
+    path = str(tmp_path / 'recommender.npz')
+    monkeypatch.setattr(DatasetRecommender, 'STATE_VERSION', 99)
+    recommender.save(path)
+    monkeypatch.undo()
+    with pytest.raises(ValueError):
+        DatasetRecommender.load(path)
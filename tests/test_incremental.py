@@ -0,0 +1,43 @@
+import json
+import pytest
+from src import MadridMetadataBooster
+from src.llm_enhancer.enhancer import EnhancedMetadata
+from src.metadata_analyzer.sources import JSONDirectorySource
+
+
+def write_catalog(directory, n: int = 12, missing_ids: int = 0):
+    records = [{'id': f'd{i}', 'title': f'Dataset de transporte {i}',
+                'description': 'Descripción del dataset de movilidad urbana en Madrid ' * (i % 3),
+                'category': 'Transporte' if i % 2 else '', 'tags': ['a', 'b'] if i % 2 else ['a'],
+                'format': 'CSV' if i % 4 else 'PDF', 'license': 'CC-BY', 'frequency': 'monthly',
+                'modified': '2024-01-01T00:00:00'} for i in range(n)]
+    for record in records[:missing_ids]:
+        del record['id']
+    with open(directory / 'catalog.json', 'w', encoding='utf-8') as f:
+        json.dump(records, f)
+
+
+def run_booster(catalog_dir, output_dir, incremental: bool):
+    booster = MadridMetadataBooster('https://example.invalid', openai_api_key='sk-test',
+                                    output_dir=str(output_dir),
+                                    catalog_source=JSONDirectorySource(str(catalog_dir)),
+                                    incremental=incremental)
+    booster.llm_enhancer.enhance_metadata = lambda dataset: EnhancedMetadata(
+        dataset['id'], f"Descripción de {dataset['title']}", ['tag'], 'Transporte', ['Ejemplo'], 0.8
+    )
+    result = booster.analyze_catalog()
+    return result['quality_summary'], result['enhancement_summary']
+
+
+@pytest.mark.parametrize('missing_ids', [0, 3])
+def test_incremental_matches_full(tmp_path, missing_ids):
+    catalog_dir = tmp_path / 'catalog'
+    catalog_dir.mkdir()
+    write_catalog(catalog_dir, missing_ids=missing_ids)
+
+    full = run_booster(catalog_dir, tmp_path / 'full', incremental=False)
+    first = run_booster(catalog_dir, tmp_path / 'incremental', incremental=True)
+    # La segunda ejecución reutiliza los resultados guardados
+    second = run_booster(catalog_dir, tmp_path / 'incremental', incremental=True)
+    assert first == full
+    assert second == full
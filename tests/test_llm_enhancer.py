@@ -0,0 +1,28 @@
+import json
+from src.llm_enhancer.cache import ResponseCache
+from src.llm_enhancer.enhancer import LLMEnhancer
+
+
+def make_datasets(n: int):
+    return [{'id': f'd{i}', 'title': f'Dataset {i}', 'description': 'Descripción', 'category': '',
+             'tags': [], 'format': 'CSV'} for i in range(n)]
+
+
+def test_failed_pack_falls_back_to_single_requests(tmp_path):
+    datasets = make_datasets(3)
+    # Grabar en la caché solo las respuestas individuales de los dos primeros datasets
+    recorder = LLMEnhancer(api_key='sk-test', response_cache=ResponseCache(str(tmp_path)))
+    recorder._chat_completion = lambda messages, max_tokens: json.dumps({
+        'description': 'Descripción mejorada', 'tags': ['a'], 'category': 'Transporte',
+        'examples': ['Ejemplo'], 'confidence': 0.9
+    })
+    for dataset in datasets[:2]:
+        recorder.enhance_metadata(dataset)
+
+    # En modo replay la petición agrupada no está en la caché
+    enhancer = LLMEnhancer(api_key='sk-test', response_cache=ResponseCache(str(tmp_path), replay=True),
+                           pack_size=3)
+    results = enhancer.batch_enhance_results(datasets)
+    assert [r.dataset_id for r in results] == ['d0', 'd1', 'd2']
+    assert [r.success for r in results] == [True, True, False]
+    assert results[0].metadata.suggested_category == 'Transporte'
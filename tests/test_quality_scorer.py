@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.quality_scorer.scorer import QualityScorer
+
+WEIGHTS = QualityScorer().weights
+
+
+def row_wise_scores(analysis_df: pd.DataFrame):
+    """Reference row-by-row implementation the column-wise scorer replaced"""
+    scores = []
+    for _, row in analysis_df.iterrows():
+        metadata_score = 0.0
+        for passed in (row['title_length'] > 0, row['description_length'] > 0, row['has_category'],
+                       row['num_tags'] > 0, row['format_score'] > 0):
+            if passed:
+                metadata_score += 0.2
+
+        length = row['description_length']
+        if not row['has_description']:
+            description_score = 0.0
+        elif length < 50:
+            description_score = 0.3
+        elif length < 100:
+            description_score = 0.6
+        elif length < 200:
+            description_score = 0.8
+        else:
+            description_score = 1.0
+
+        category_score = 1.0 if row['has_category'] else 0.0
+        tags_score = min(row['num_tags'] / 5, 1.0)
+        overall_score = (
+            metadata_score * WEIGHTS['metadata'] +
+            row['format_score'] * WEIGHTS['format'] +
+            row['license_score'] * WEIGHTS['license'] +
+            row['frequency_score'] * WEIGHTS['frequency'] +
+            description_score * WEIGHTS['description'] +
+            category_score * WEIGHTS['category'] +
+            tags_score * WEIGHTS['tags']
+        )
+
+        issues = []
+        if row['title_length'] < 10:
+            issues.append("Título demasiado corto")
+        if row['description_length'] < 50:
+            issues.append("Descripción insuficiente")
+        if not row['has_category']:
+            issues.append("Falta categoría")
+        if row['num_tags'] < 3:
+            issues.append("Pocas etiquetas")
+        if row['format_score'] < 0.7:
+            issues.append("Formato no óptimo")
+        if row['license_score'] < 0.8:
+            issues.append("Licencia restrictiva")
+        if row['frequency_score'] < 0.6:
+            issues.append("Baja frecuencia de actualización")
+        if row['days_since_update'] > 365:
+            issues.append("Dataset desactualizado")
+
+        scores.append({
+            'dataset_id': row['id'],
+            'overall_score': overall_score,
+            'metadata_score': metadata_score,
+            'format_score': row['format_score'],
+            'license_score': row['license_score'],
+            'frequency_score': row['frequency_score'],
+            'description_score': description_score,
+            'category_score': category_score,
+            'tags_score': tags_score,
+            'issues': issues
+        })
+    return scores
+
+
+def random_analysis(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    description_length = rng.choice([0, 10, 49, 50, 99, 100, 199, 200, 500], n)
+    return pd.DataFrame({
+        'id': [f'd{i}' for i in range(n)],
+        'title_length': rng.integers(0, 40, n),
+        'description_length': description_length,
+        'has_description': (description_length > 0) & (rng.random(n) < 0.9),
+        'has_category': rng.random(n) < 0.5,
+        'num_tags': rng.integers(0, 9, n),
+        'format_score': rng.choice([1.0, 0.8, 0.7, 0.6, 0.5, 0.3], n),
+        'license_score': rng.choice([1.0, 0.9, 0.8, 0.5], n),
+        'frequency_score': rng.choice([1.0, 0.8, 0.6, 0.5, 0.3], n),
+        'days_since_update': rng.integers(0, 800, n)
+    })
+
+
+def test_column_wise_scores_match_row_wise_reference():
+    analysis_df = random_analysis(2000)
+    expected = row_wise_scores(analysis_df)
+    scores = QualityScorer().calculate_scores(analysis_df)
+
+    assert scores.to_records() == expected
+
+
+def test_summary_matches_row_wise_reference():
+    analysis_df = random_analysis(2000, seed=1)
+    expected = row_wise_scores(analysis_df)
+    summary = QualityScorer().get_quality_summary(QualityScorer().calculate_scores(analysis_df))
+
+    overall = [s['overall_score'] for s in expected]
+    # Solo cambia el orden de la suma en coma flotante
+    assert summary['average_score'] == pytest.approx(sum(overall) / len(overall))
+    assert summary['score_distribution'] == {
+        'excellent': sum(s >= 0.8 for s in overall),
+        'good': sum(0.6 <= s < 0.8 for s in overall),
+        'fair': sum(0.4 <= s < 0.6 for s in overall),
+        'poor': sum(s < 0.4 for s in overall)
+    }
+    counts = {}
+    for s in expected:
+        for issue in s['issues']:
+            counts[issue] = counts.get(issue, 0) + 1
+    assert summary['common_issues'] == counts
+    assert list(summary['common_issues'].values()) == sorted(counts.values(), reverse=True)
+
+
+def test_empty_analysis():
+    scores = QualityScorer().calculate_scores(pd.DataFrame())
+    assert len(scores) == 0 and scores.to_records() == []
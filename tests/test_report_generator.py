@@ -0,0 +1,61 @@
+import os
+from datetime import datetime
+import pytest
+from src.report_generator.generator import ReportData, ReportGenerator
+
+try:
+    import weasyprint
+except (ImportError, OSError):  # OSError si faltan las bibliotecas nativas (pango, cairo)
+    weasyprint = None
+
+
+def report_inputs(n: int = 12):
+    problematic = [{'id': f'd{i}', 'title': f'Dataset {i}', 'problems': ['Falta categoría']}
+                   for i in range(n)]
+    enhanced = [{'dataset_id': f'd{i}', 'improved_description': 'Descripción', 'suggested_tags': ['a', 'b'],
+                 'suggested_category': 'Transporte', 'usage_examples': ['Ejemplo'], 'confidence_score': 0.9}
+                for i in range(n)]
+    return {
+        'quality_scores': [],
+        'enhanced_metadata': enhanced,
+        'problematic_datasets': problematic,
+        'quality_summary': {
+            'total_datasets': n,
+            'average_score': 0.5,
+            'score_distribution': {'excellent': 1, 'good': 2, 'fair': 3, 'poor': n - 6},
+            'common_issues': {'Falta categoría': n}
+        },
+        'enhancement_summary': {'total_enhanced': n, 'average_confidence': 0.9}
+    }
+
+
+def test_html_report(tmp_path):
+    with ReportGenerator() as generator:
+        paths = generator.generate_monthly_report(**report_inputs(), output_dir=str(tmp_path))
+    with open(paths['html'], encoding='utf-8') as f:
+        html = f.read()
+    assert 'Dataset 11' in html and 'Transporte' in html
+
+
+def test_sharded_report_pages(tmp_path):
+    generator = ReportGenerator()
+    paths = generator.generate_sharded_report(
+        ReportData(**report_inputs(), generation_date=datetime(2024, 1, 1)),
+        str(tmp_path / 'report.html'), shard_size=5, max_workers=2
+    )
+    # Índice + 3 páginas de problemas + 3 de mejoras
+    assert len(paths) == 7 and all(os.path.exists(p) for p in paths)
+    with open(paths[0], encoding='utf-8') as f:
+        index = f.read()
+    assert 'report_problematic_003.html' in index and 'report_enhanced_001.html' in index
+
+
+@pytest.mark.skipif(weasyprint is None, reason='WeasyPrint or its native libraries are not available')
+def test_pdf_report_from_sharded_html(tmp_path):
+    with ReportGenerator() as generator:
+        paths = generator.generate_monthly_report(**report_inputs(), output_dir=str(tmp_path),
+                                                  format='both', shard_size=5)
+    assert paths['html'].endswith('.html')
+    with open(paths['pdf'], 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+    assert generator._pdf_executor is None